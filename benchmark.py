@@ -0,0 +1,387 @@
+"""Benchmarks of the analysis pipeline on synthetic survey data.
+
+Each stage (scoring, the numeric path, scaling, every chart and the word clouds) is timed
+on its own at several sizes, by default 1k, 100k and 1M rows. Charts are rendered with
+the Agg backend. Peak memory is measured in a separate run of each stage under
+tracemalloc, so tracing does not distort the timings.
+
+With --startup, the app's startup is measured too, in fresh interpreters: the import of
+sentiment_analysis (all the window waits for), the import of sentiment_core, the
+background warm-up, and the time until the window is drawn when a display is available.
+Imports are timed with `python -X importtime` and the slowest modules are listed.
+
+Results can be saved as a JSON baseline and compared against one later; any stage that
+got slower or uses more memory than the threshold allows is reported, and the exit
+status is 1.
+
+    python benchmark.py --startup --save baseline.json
+    python benchmark.py --startup --baseline baseline.json --threshold 0.25
+    python benchmark.py --startup --sizes ""
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from sentiment_core import (
+    analyze_numeric_column,
+    analyze_numeric_ratings,
+    analyze_sentiment,
+    analyze_sentiment_batch,
+    count_sentiment_words,
+    generate_bar_chart_numeric,
+    generate_bar_chart_text,
+    generate_pie_chart,
+    generate_scatter_plot,
+    generate_sentiment_pie_chart,
+    generate_sentiment_scatter_plot,
+    generate_wordcloud,
+    scale_numbers,
+    SENTIMENT_LABELS,
+)
+
+DEFAULT_SIZES = "1k,100k,1M"
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+# analyze_sentiment scores one text at a time, so it only gets a sample of the rows.
+ANALYZE_SENTIMENT_SAMPLE = 2_000
+# Fresh interpreters started per startup measurement; the best run is kept.
+STARTUP_REPEAT = 5
+# Modules listed by the startup benchmark, by cumulative import time.
+STARTUP_TOP_MODULES = 10
+# Differences below these are noise, whatever the relative change.
+MIN_SECONDS_CHANGE = 0.005
+MIN_MB_CHANGE = 1.0
+
+# ==================== Synthetic Data ====================
+OPENERS = ["", "Honestly,", "Overall", "I think", "Lately", "This quarter", "As a new hire,"]
+SUBJECTS = ["my workload", "the team", "my manager", "remote work", "the office", "our meetings",
+            "work-life balance", "the schedule", "on-call duty", "career growth"]
+VERBS = ["is", "has been", "feels", "seems", "was"]
+ADVERBS = ["", "very", "really", "not", "quite", "extremely", "somewhat"]
+ADJECTIVES = ["good", "great", "bad", "terrible", "fine", "okay", "stressful", "flexible",
+              "exhausting", "excellent", "awful", "reasonable", "unpredictable", "supportive"]
+ENDINGS = ["", ".", "!", " :)", " :(", ", but it could be better.", " and I love it."]
+DEPARTMENTS = ["Engineering", "Sales", "Support", "Marketing", "Finance", "HR", "Legal",
+               "Operations", "Design", "Research", "IT", "Facilities"]
+
+def _parse_size(text):
+    """Parse a row count such as '1000', '100k' or '1M'."""
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+def make_survey(rows, seed=0):
+    """Return a synthetic survey with free-text, 1-5 rating, percentage and department columns.
+
+    About a third of the answers carry a team number, so the share of distinct texts is
+    close to that of real exports. A few answers are missing or unparseable.
+    """
+    rng = np.random.default_rng(seed)
+
+    def pick(options):
+        return pd.Series(np.asarray(options, dtype=object)[rng.integers(len(options), size=rows)])
+
+    text = (pick(OPENERS) + " " + pick(SUBJECTS) + " " + pick(VERBS) + " " + pick(ADVERBS) + " "
+            + pick(ADJECTIVES) + pick(ENDINGS)).str.split().str.join(" ")
+    tagged = rng.random(rows) < 0.3
+    text[tagged] = text[tagged] + " (team " + pd.Series(rng.integers(10_000, size=rows)).astype(str)[tagged] + ")"
+    text[rng.random(rows) < 0.01] = np.nan
+
+    rating = pd.Series(rng.choice([1, 2, 3, 4, 5], size=rows, p=[0.1, 0.15, 0.25, 0.3, 0.2]), dtype=object)
+    rating[rng.random(rows) < 0.02] = "N/A"
+    percent = pd.Series(rng.integers(0, 101, size=rows)).astype(str) + "%"
+
+    return pd.DataFrame({
+        'text': text,
+        'rating': rating,
+        'percent': percent,
+        'department': pick(DEPARTMENTS),
+    })
+
+# ==================== Stages ====================
+def _render(fig):
+    """Draw a figure on an Agg canvas, as the Tk canvas would."""
+    FigureCanvasAgg(fig).draw()
+
+def prepare_inputs(survey):
+    """Compute (untimed) the analysis results the chart and word cloud stages draw from."""
+    labels, polarities = analyze_sentiment_batch(survey['text'])
+    text_results = pd.DataFrame({
+        'sentiment': pd.Categorical(labels, categories=SENTIMENT_LABELS),
+        'polarity': polarities.astype(np.float32),
+    })
+    word_counts = {'Positive': Counter(), 'Negative': Counter()}
+    count_sentiment_words(survey['text'], labels, word_counts)
+    numeric = analyze_numeric_column(survey['rating'])
+    numeric_results = pd.DataFrame({
+        'numeric': numeric['numeric'],
+        'scaled': numeric['scaled'].astype(np.float32),
+        'rating_sentiment': pd.Categorical(numeric['labels'], categories=SENTIMENT_LABELS),
+    })
+    return {
+        'survey': survey,
+        'labels': labels,
+        'text_results': text_results,
+        'word_counts': word_counts,
+        'numeric_results': numeric_results,
+    }
+
+def _analyze_sentiment_sample(inputs):
+    for text in inputs['survey']['text'].iloc[:ANALYZE_SENTIMENT_SAMPLE]:
+        analyze_sentiment(text)
+
+# (name, function of the prepare_inputs dict, rows processed or None for all rows)
+STAGES = [
+    ("analyze_sentiment", _analyze_sentiment_sample, ANALYZE_SENTIMENT_SAMPLE),
+    ("analyze_sentiment_batch", lambda inputs: analyze_sentiment_batch(inputs['survey']['text']), None),
+    ("count_sentiment_words", lambda inputs: count_sentiment_words(
+        inputs['survey']['text'], inputs['labels'], {'Positive': Counter(), 'Negative': Counter()}), None),
+    ("numeric_path[rating]", lambda inputs: analyze_numeric_column(inputs['survey']['rating']), None),
+    ("numeric_path[percent]", lambda inputs: analyze_numeric_column(inputs['survey']['percent']), None),
+    ("analyze_numeric_ratings", lambda inputs: analyze_numeric_ratings(inputs['survey'], 'rating'), None),
+    ("scale_numbers", lambda inputs: scale_numbers(inputs['numeric_results']['numeric']), None),
+    ("generate_pie_chart", lambda inputs: _render(generate_pie_chart(inputs['text_results'])), None),
+    ("generate_scatter_plot", lambda inputs: _render(generate_scatter_plot(inputs['text_results'])), None),
+    ("generate_bar_chart_text", lambda inputs: _render(generate_bar_chart_text(inputs['text_results'])), None),
+    ("generate_sentiment_pie_chart",
+     lambda inputs: _render(generate_sentiment_pie_chart(inputs['numeric_results'])), None),
+    ("generate_sentiment_scatter_plot",
+     lambda inputs: _render(generate_sentiment_scatter_plot(inputs['numeric_results'])), None),
+    ("generate_bar_chart_numeric",
+     lambda inputs: _render(generate_bar_chart_numeric(inputs['numeric_results'])), None),
+    ("generate_wordcloud[positive]",
+     lambda inputs: _render(generate_wordcloud(inputs['word_counts']['Positive'], "Positive Word Cloud")), None),
+    ("generate_wordcloud[negative]",
+     lambda inputs: _render(generate_wordcloud(inputs['word_counts']['Negative'], "Negative Word Cloud")), None),
+]
+
+# ==================== Measurement ====================
+def measure(func, inputs, repeat=DEFAULT_REPEAT, memory=True):
+    """Return the best wall time of repeat runs and, if memory is set, the peak allocation in MB."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(inputs)
+        times.append(time.perf_counter() - start)
+    result = {'seconds': min(times)}
+    if memory:
+        tracemalloc.start()
+        try:
+            func(inputs)
+            result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return result
+
+def warm_up():
+    """Load the lexicon, the TextBlob corpora and the word cloud font before timing anything."""
+    inputs = prepare_inputs(make_survey(100))
+    for _, func, _ in STAGES:
+        func(inputs)
+
+def run_benchmarks(sizes, repeat=DEFAULT_REPEAT, memory=True, stages=None, seed=0, log=None):
+    """Run the selected stages (all by default) at every size; returns {rows: {stage: result}}."""
+    results = {}
+    if not sizes:
+        return results
+    warm_up()
+    for rows in sizes:
+        inputs = prepare_inputs(make_survey(rows, seed))
+        results[str(rows)] = size_results = {}
+        for name, func, stage_rows in STAGES:
+            if stages and name not in stages:
+                continue
+            result = measure(func, inputs, repeat, memory)
+            result['rows'] = min(rows, stage_rows) if stage_rows else rows
+            result['rows_per_second'] = result['rows'] / result['seconds'] if result['seconds'] else None
+            size_results[name] = result
+            if log is not None:
+                log(f"{rows:>9,} rows  {name:<34}{_format_result(result)}")
+    return results
+
+def _format_result(result):
+    text = f"{result['seconds'] * 1000:10.1f} ms"
+    if result.get('rows_per_second'):
+        text += f"  {result['rows_per_second']:14,.0f} rows/s"
+    if 'peak_mb' in result:
+        text += f"  {result['peak_mb']:9.1f} MB peak"
+    return text
+
+# ==================== Startup ====================
+# Snippets run in a fresh interpreter; each prints the seconds it measured.
+STARTUP_SNIPPETS = {
+    'import_app': "import sentiment_analysis",
+    'import_core': "import sentiment_core",
+    'prewarm': ("import time, sentiment_analysis\n"
+                "start = time.perf_counter()\n"
+                "sentiment_analysis.prewarm(cache_path=None)\n"
+                "print(time.perf_counter() - start)"),
+    'window': ("import time\n"
+               "start = time.perf_counter()\n"
+               "import sentiment_analysis\n"
+               "app = sentiment_analysis.SentimentApp()\n"
+               "app.update()\n"
+               "print(time.perf_counter() - start)\n"
+               "app.destroy()"),
+}
+
+def parse_importtime(stderr):
+    """Return (module, self seconds, cumulative seconds) for each line of -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return modules
+
+def _run_snippet(code):
+    """Run code in a fresh interpreter with -X importtime; returns (stdout, stderr) or None if it failed."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get('PYTHONPATH')])))
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=here, env=env,
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        return None
+    return process.stdout, process.stderr
+
+def measure_startup(repeat=STARTUP_REPEAT, log=None):
+    """Time each STARTUP_SNIPPETS entry in fresh interpreters; returns {name: result}.
+
+    Import results hold the cumulative import time of the module, the number of modules
+    loaded and the slowest of them. 'window' is skipped when no display is available.
+    """
+    results = {}
+    for name, code in STARTUP_SNIPPETS.items():
+        best = None
+        for _ in range(repeat):
+            output = _run_snippet(code)
+            if output is None:
+                break
+            stdout, stderr = output
+            modules = parse_importtime(stderr)
+            seconds = float(stdout) if stdout.strip() else modules[-1][2]
+            if best is None or seconds < best[0]:
+                best = (seconds, modules)
+        if best is None:
+            if log is not None:
+                log(f"{'startup':>14}  {name:<34}skipped (failed; no display?)")
+            continue
+        seconds, modules = best
+        slowest = sorted(modules, key=lambda module: module[2], reverse=True)[:STARTUP_TOP_MODULES]
+        results[name] = {
+            'seconds': seconds,
+            'modules': len(modules),
+            'slowest_imports': [{'module': module, 'self': own, 'cumulative': cumulative}
+                                for module, own, cumulative in slowest],
+        }
+        if log is not None:
+            log(f"{'startup':>14}  {name:<34}{seconds * 1000:10.1f} ms  {len(modules):6} modules imported")
+            if name.startswith('import_'):
+                for module, own, cumulative in slowest[:5]:
+                    log(f"{'':>16}{module:<40}{cumulative * 1000:10.1f} ms cumulative")
+    return results
+
+def environment():
+    """Versions and machine details stored with a baseline."""
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return a message for every stage that is more than threshold slower or bigger than the baseline.
+
+    Only stages and sizes present in both are compared.
+    """
+    regressions = []
+    for size, stages in results.items():
+        for name, result in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            checks = [('seconds', 's', MIN_SECONDS_CHANGE), ('peak_mb', 'MB', MIN_MB_CHANGE)]
+            for key, unit, min_change in checks:
+                if key not in result or key not in base:
+                    continue
+                old, new = base[key], result[key]
+                if new - old > min_change and new > old * (1 + threshold):
+                    change = (new / old - 1) * 100 if old else float('inf')
+                    where = "startup" if size == "startup" else f"{int(size):,} rows"
+                    regressions.append(f"{name} at {where}: {key} {old:.3f}{unit} -> "
+                                       f"{new:.3f}{unit} (+{change:.0f}%)")
+    return regressions
+
+# ==================== Command Line ====================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the sentiment analysis pipeline on synthetic surveys.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated row counts, e.g. 1k,100k,1M, or \"\" for none (default: {DEFAULT_SIZES})")
+    parser.add_argument("--startup", action="store_true",
+                        help="also measure import, warm-up and window startup times in fresh interpreters")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"timed runs per stage; the best is kept (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--stage", action="append", dest="stages", choices=[name for name, _, _ in STAGES],
+                        help="only run this stage (can be repeated)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory runs")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data")
+    parser.add_argument("--save", metavar="PATH", help="write the results to a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare the results against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"relative slowdown or memory growth counted as a regression "
+                             f"(default: {DEFAULT_THRESHOLD})")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = [_parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot read baseline: {e}", file=sys.stderr)
+            return 2
+
+    results = run_benchmarks(sizes, args.repeat, not args.no_memory, args.stages, args.seed, log=print)
+    if args.startup:
+        results['startup'] = measure_startup(log=print)
+
+    if args.save:
+        report = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Column-oriented reading of survey files.
+
+CSV, Parquet and Feather/Arrow IPC files are supported. Analysis only ever needs one
+column, so these helpers read the column list from the file's header or metadata and
+then load just the selected column. Parquet and Feather files are memory-mapped.
+Reading Parquet or Feather needs pyarrow, which is imported only when such a file is
+opened.
+"""
+import os
+
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 50_000
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+
+# For tkinter file dialogs.
+FILE_TYPES = [
+    ("Data files", "*.csv *.parquet *.pq *.feather *.arrow *.ipc"),
+    ("CSV files", "*.csv"),
+    ("Parquet files", "*.parquet *.pq"),
+    ("Feather/Arrow files", "*.feather *.arrow *.ipc"),
+]
+
+def file_format(path):
+    """Return 'parquet', 'feather' or 'csv' from the file extension (CSV for anything else)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PARQUET_EXTENSIONS:
+        return 'parquet'
+    if ext in FEATHER_EXTENSIONS:
+        return 'feather'
+    return 'csv'
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Reading Parquet or Feather files requires pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+def read_columns(path):
+    """Return the column names of a file without reading its rows."""
+    fmt = file_format(path)
+    if fmt == 'parquet':
+        return list(_pyarrow().parquet.read_schema(path, memory_map=True).names)
+    if fmt == 'feather':
+        pa = _pyarrow()
+        with pa.memory_map(path) as source:
+            return list(pa.ipc.open_file(source).schema.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def _read_table(path, columns):
+    """Read some columns of a Parquet or Feather file as a memory-mapped Arrow table."""
+    pa = _pyarrow()
+    if file_format(path) == 'parquet':
+        return pa.parquet.read_table(path, columns=columns, memory_map=True)
+    return pa.feather.read_table(path, columns=columns, memory_map=True)
+
+def read_frame(path, columns):
+    """Read only the given columns of a file as a DataFrame, in the given order."""
+    columns = list(dict.fromkeys(columns))
+    if file_format(path) == 'csv':
+        return pd.read_csv(path, usecols=columns)[columns]
+    return _read_table(path, columns).to_pandas()[columns]
+
+def iter_frame_chunks(path, columns, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield the given columns of a file as DataFrames of at most chunksize rows, in the given order."""
+    columns = list(dict.fromkeys(columns))
+    fmt = file_format(path)
+    if fmt == 'csv':
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+            yield chunk[columns]
+    elif fmt == 'parquet':
+        parquet_file = _pyarrow().parquet.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()[columns]
+    else:
+        for batch in _read_table(path, columns).to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()[columns]
+
+def iter_column_chunks(path, column, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield the given column of a file as a series of at most chunksize rows."""
+    for chunk in iter_frame_chunks(path, [column], chunksize):
+        yield chunk[column]
@@ -0,0 +1,166 @@
+"""Persistent cache of sentiment polarities, keyed by text.
+
+Survey answers repeat a lot ("Good", "N/A", "Too many meetings"), and the same
+exports are analyzed again and again. PolarityCache keeps polarities in two tiers:
+an in-process LRU dict, and an SQLite file that survives restarts. Both tiers have
+a size limit and evict the least recently used entries first. Uses of cached texts,
+including the ones served from memory, are written to SQLite in batches: whenever new
+polarities are stored, on close(), and every TOUCH_FLUSH_SIZE texts in between.
+
+Keys are a hash of the whitespace-normalized text together with the analyzer
+version, so upgrading the scorer never serves stale polarities.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sentiment-analysis", "polarity.sqlite")
+# get_many writes pending last_used times once this many texts have been used since the last write.
+TOUCH_FLUSH_SIZE = 10_000
+
+def normalize_text(text):
+    """Collapse runs of whitespace; the pattern tokenizer does the same, so polarity is unchanged."""
+    return " ".join(str(text).split())
+
+class PolarityCache:
+    """Two-tier (memory LRU + SQLite) polarity cache with hit/miss counters.
+
+    Pass path=None for a memory-only cache. The object is safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, version="", memory_size=100_000, disk_size=2_000_000):
+        self.path = path
+        self.version = version
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                         'memory_evictions': 0, 'disk_evictions': 0}
+        self._memory = OrderedDict()
+        # Keys used since their last_used was last written to SQLite.
+        self._touched = set()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS polarity "
+                             "(key BLOB PRIMARY KEY, polarity REAL NOT NULL, last_used REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS polarity_last_used ON polarity (last_used)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM polarity").fetchone()[0]
+
+    def key(self, text):
+        """Return the cache key of a text for this cache's analyzer version."""
+        data = f"{self.version}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def get_many(self, texts):
+        """Return a list with the cached polarity of each text, or None where it is not cached."""
+        keys = [self.key(text) for text in texts]
+        results = [None] * len(keys)
+        with self._lock:
+            missing = []
+            for i, key in enumerate(keys):
+                polarity = self._memory.get(key)
+                if polarity is None:
+                    missing.append(i)
+                else:
+                    self._memory.move_to_end(key)
+                    results[i] = polarity
+                    if self._db is not None:
+                        self._touched.add(key)
+            self.counters['memory_hits'] += len(keys) - len(missing)
+
+            if self._db is not None and missing:
+                found = {}
+                wanted = [keys[i] for i in missing]
+                # SQLite limits the number of bound parameters per statement.
+                for start in range(0, len(wanted), 500):
+                    batch = wanted[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, polarity FROM polarity WHERE key IN ({','.join('?' * len(batch))})", batch)
+                    found.update(rows)
+                self._touched.update(found)
+                still_missing = []
+                for i in missing:
+                    polarity = found.get(keys[i])
+                    if polarity is None:
+                        still_missing.append(i)
+                    else:
+                        results[i] = polarity
+                        self._remember(keys[i], polarity)
+                self.counters['disk_hits'] += len(missing) - len(still_missing)
+                missing = still_missing
+            self.counters['misses'] += len(missing)
+            if self._db is not None and len(self._touched) >= TOUCH_FLUSH_SIZE:
+                self._flush_touched()
+                self._db.commit()
+        return results
+
+    def _flush_touched(self):
+        """Write the time of use of the keys used since the last flush (without committing)."""
+        if self._db is not None and self._touched:
+            now = time.time()
+            self._db.executemany("UPDATE polarity SET last_used = ? WHERE key = ?",
+                                 [(now, key) for key in self._touched])
+        self._touched.clear()
+
+    def put_many(self, texts, polarities):
+        """Store the polarity of each text in both tiers."""
+        entries = [(self.key(text), float(polarity)) for text, polarity in zip(texts, polarities)]
+        with self._lock:
+            for key, polarity in entries:
+                self._remember(key, polarity)
+            if self._db is not None and entries:
+                self._flush_touched()
+                now = time.time()
+                cursor = self._db.executemany(
+                    "INSERT OR IGNORE INTO polarity (key, polarity, last_used) VALUES (?, ?, ?)",
+                    [(key, polarity, now) for key, polarity in entries])
+                self._disk_count += max(cursor.rowcount, 0)
+                if self._disk_count > self.disk_size:
+                    # Evict down to 90% of the limit so inserts don't evict on every batch.
+                    # Entries stored at the same time go in the order they were inserted.
+                    excess = self._disk_count - int(self.disk_size * 0.9)
+                    self._db.execute("DELETE FROM polarity WHERE key IN "
+                                     "(SELECT key FROM polarity ORDER BY last_used, rowid LIMIT ?)", (excess,))
+                    self._disk_count -= excess
+                    self.counters['disk_evictions'] += excess
+                self._db.commit()
+
+    def _remember(self, key, polarity):
+        self._memory[key] = polarity
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.counters['memory_evictions'] += 1
+
+    def stats(self):
+        """Return the hit/miss/eviction counters and the number of entries in each tier."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = self._disk_count if self._db is not None else 0
+        return stats
+
+    def clear(self):
+        """Drop every cached polarity from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM polarity")
+                self._db.commit()
+                self._disk_count = 0
+
+    def close(self):
+        """Write pending times of use and close the SQLite file."""
+        with self._lock:
+            if self._db is not None:
+                self._flush_touched()
+                self._db.commit()
+                self._db.close()
+                self._db = None
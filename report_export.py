@@ -0,0 +1,214 @@
+"""Headless export of the charts and summary of many datasets or groups.
+
+For every file, or every group of a --group-by column (e.g. one report per team), the
+selected column is analyzed like SentimentApp.perform_analysis does, and each chart of
+its tabs is saved as PNG, SVG and/or PDF with the Agg backend next to a summary.txt.
+Reports are spread over a pool of processes.
+
+Each process draws a chart into the figure it used for the same chart of its previous
+report (a template) instead of building a new figure, and empties the figure once it is
+saved, so memory stays flat over thousands of reports.
+
+Usage:
+    python report_export.py survey.csv --column text_reviews --group-by team --out reports
+    python report_export.py q1.csv q2.parquet --column rating --format png,pdf --workers 4
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from data_sources import read_columns, read_frame
+from sentiment_core import group_codes, load_lexicon_index, run_analysis
+
+FORMATS = ('png', 'svg', 'pdf')
+DEFAULT_FORMATS = ('png',)
+DEFAULT_DPI = 100
+DEFAULT_OUT_DIR = "reports"
+# Reports submitted to the pool per worker before waiting for one to finish; bounds how
+# many group frames are in memory at once.
+REPORTS_IN_FLIGHT_PER_WORKER = 2
+
+# ==================== Report Jobs ====================
+def slugify(name):
+    """A file-name-safe version of name."""
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('._') or "report"
+
+def unique_slug(name, used):
+    """slugify(name), with a numeric suffix if it is already in used (which it is added to)."""
+    slug = base = slugify(name)
+    n = 2
+    while slug in used:
+        slug = f"{base}-{n}"
+        n += 1
+    used.add(slug)
+    return slug
+
+def report_jobs(data, column, dataset, group_by=None, directory=None):
+    """Yield (report name, output subdirectory, frame) for a dataset, or for each group of group_by.
+
+    Each frame holds only the analyzed column, with rows renumbered from 0 as if the group
+    had been loaded from a file of its own.
+    """
+    directory = directory or slugify(dataset)
+    if group_by is None:
+        yield dataset, directory, data[[column]].reset_index(drop=True)
+        return
+    codes, groups = group_codes(data, group_by)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+    used = set()
+    for i, group in enumerate(groups):
+        label = "(missing)" if pd.isna(group) else str(group)
+        rows = order[bounds[i]:bounds[i + 1]]
+        yield (f"{dataset} / {label}", os.path.join(directory, unique_slug(label, used)),
+               data[[column]].iloc[rows].reset_index(drop=True))
+
+# ==================== Rendering ====================
+# Figure of each chart title, reused for that chart of every report this process exports.
+_TEMPLATES = {}
+
+def render_charts(charts, directory, formats=DEFAULT_FORMATS, dpi=DEFAULT_DPI):
+    """Draw each (title, build) chart of run_analysis into its template and save it in every format.
+
+    The template is emptied after saving, so it does not keep the last report's data alive.
+    Returns the paths written.
+    """
+    paths = []
+    for title, build in charts:
+        fig = build(_TEMPLATES.get(title))
+        if title not in _TEMPLATES:
+            FigureCanvasAgg(fig)
+            _TEMPLATES[title] = fig
+        try:
+            for fmt in formats:
+                path = os.path.join(directory, f"{slugify(title.lower())}.{fmt}")
+                fig.savefig(path, format=fmt, dpi=dpi)
+                paths.append(path)
+        finally:
+            for ax in fig.axes:
+                ax.clear()
+    return paths
+
+def write_summary(path, name, column, rows, analysis):
+    lines = [f"Report: {name}", f"Column: {column}", f"Rows: {rows:,}", "", analysis['summary']]
+    if analysis['word_cloud_message']:
+        lines += ["", analysis['word_cloud_message']]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+def export_report(name, directory, frame, formats=DEFAULT_FORMATS, dpi=DEFAULT_DPI):
+    """Analyze the single column of frame and write its charts and summary.txt into directory."""
+    start = time.perf_counter()
+    column = frame.columns[0]
+    os.makedirs(directory, exist_ok=True)
+    # The reports themselves run in parallel, so each one is scored in its own process.
+    analysis = run_analysis(frame, column, parallel=False)
+    files = render_charts(analysis['charts'], directory, formats, dpi)
+    summary_path = os.path.join(directory, "summary.txt")
+    write_summary(summary_path, name, column, len(frame), analysis)
+    files.append(summary_path)
+    return {
+        'name': name,
+        'directory': directory,
+        'rows': len(frame),
+        'files': files,
+        'seconds': time.perf_counter() - start,
+    }
+
+def export_reports(jobs, out_dir=DEFAULT_OUT_DIR, formats=DEFAULT_FORMATS, dpi=DEFAULT_DPI,
+                   workers=None, progress=None):
+    """Export every (name, subdirectory, frame) job under out_dir; returns the results in job order.
+
+    With more than one worker the reports are spread over a process pool, and only a few
+    jobs per worker are taken from jobs at a time, so it can be a generator over thousands
+    of groups. progress(result) is called as each report is written.
+    """
+    workers = workers or os.cpu_count() or 1
+    results = {}
+
+    def finished(index, result):
+        results[index] = result
+        if progress is not None:
+            progress(result)
+
+    if workers == 1:
+        for index, (name, directory, frame) in enumerate(jobs):
+            finished(index, export_report(name, os.path.join(out_dir, directory), frame, formats, dpi))
+    else:
+        # Loaded once here, so forked workers start with the lexicon.
+        load_lexicon_index()
+        with ProcessPoolExecutor(workers) as pool:
+            pending = {}
+            for index, (name, directory, frame) in enumerate(jobs):
+                if len(pending) >= workers * REPORTS_IN_FLIGHT_PER_WORKER:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finished(pending.pop(future), future.result())
+                future = pool.submit(export_report, name, os.path.join(out_dir, directory), frame, formats, dpi)
+                pending[future] = index
+            for future in as_completed(pending):
+                finished(pending[future], future.result())
+    return [results[index] for index in sorted(results)]
+
+# ==================== Command Line ====================
+def file_jobs(paths, column, group_by=None):
+    """Yield the report jobs of each file in turn, reading a file only when its jobs are needed."""
+    used = set()
+    for path in paths:
+        selected = column or read_columns(path)[0]
+        data = read_frame(path, [selected] if group_by is None else [selected, group_by])
+        dataset = os.path.splitext(os.path.basename(path))[0]
+        yield from report_jobs(data, selected, dataset, group_by, unique_slug(dataset, used))
+
+def parse_formats(value):
+    formats = [fmt.strip().lower() for fmt in value.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"formats must be some of {', '.join(FORMATS)}")
+    return formats
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export the charts and summary of each file or group.")
+    parser.add_argument("paths", nargs="+", help="CSV, Parquet or Feather files")
+    parser.add_argument("--column", help="column to analyze (default: first column of each file)")
+    parser.add_argument("--group-by", metavar="COLUMN", help="write one report per value of this column")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help=f"output directory (default: {DEFAULT_OUT_DIR})")
+    parser.add_argument("--format", type=parse_formats, default=list(DEFAULT_FORMATS),
+                        help=f"comma-separated image formats: {', '.join(FORMATS)} (default: png)")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI, help=f"PNG resolution (default: {DEFAULT_DPI})")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processes exporting reports; 0 means one per core (default: 0)")
+    parser.add_argument("--json", action="store_true", help="print what was written as JSON")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def report(result):
+        if not args.json:
+            print(f"{result['name']}: {len(result['files'])} files, {result['rows']:,} rows, "
+                  f"{result['seconds']:.2f}s", flush=True)
+
+    start = time.perf_counter()
+    try:
+        results = export_reports(file_jobs(args.paths, args.column, args.group_by), args.out, args.format,
+                                 args.dpi, args.workers or None, report)
+    except (OSError, ImportError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Exported {len(results)} reports to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
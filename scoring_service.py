@@ -0,0 +1,349 @@
+"""Local scoring service: the labels and polarities of analyze_sentiment over HTTP.
+
+Other tools send texts to a long-running process that keeps the sentiment lexicon warm
+in memory. Concurrent requests are gathered into micro-batches (up to --max-batch-size
+texts, waiting at most --max-wait-ms for more to arrive) and each batch is scored with
+analyze_sentiment_batch on a worker thread, so the event loop keeps accepting requests.
+When more than --max-pending texts are queued, new requests are refused with 503 and a
+Retry-After header instead of queueing without bound.
+
+Only the standard library is used for serving (asyncio streams and a minimal HTTP/1.1
+implementation with keep-alive), listening on a TCP port or a Unix socket.
+
+    python scoring_service.py --port 8765
+    python scoring_service.py --unix /tmp/sentiment.sock
+    curl -s localhost:8765/score -d '{"texts": ["I love my job", "Worst job ever!"]}'
+
+Endpoints:
+    POST /score    {"text": "..."} -> {"label": ..., "polarity": ...}
+                   {"texts": [...]} -> {"results": [{"label": ..., "polarity": ...}, ...]}
+    GET  /metrics  request, batch, throughput, latency and queue depth figures
+    GET  /health   {"status": "ok"}
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import stat
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from polarity_cache import PolarityCache
+from sentiment_core import ANALYZER_VERSION, analyze_sentiment_batch, load_lexicon_index
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+# Texts queued or being scored before new requests are refused.
+DEFAULT_MAX_PENDING = 10_000
+MAX_BODY_BYTES = 1_000_000
+MAX_TEXTS_PER_REQUEST = 1_000
+# Latencies kept for the percentiles reported by /metrics.
+LATENCY_WINDOW = 10_000
+
+# ==================== Micro-Batching ====================
+class Overloaded(Exception):
+    """Raised by MicroBatcher.score when accepting the texts would exceed max_pending."""
+
+class ServiceMetrics:
+    """Counters and recent latencies; only touched from the event loop thread."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.texts = 0
+        self.rejected = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.largest_batch = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_texts += size
+        self.largest_batch = max(self.largest_batch, size)
+
+    def record_request(self, texts, seconds):
+        self.requests += 1
+        self.texts += texts
+        self.latencies.append(seconds)
+
+    def snapshot(self, pending=0):
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        return {
+            'uptime_seconds': uptime,
+            'requests': self.requests,
+            'texts': self.texts,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'requests_per_second': self.requests / uptime if uptime else 0.0,
+            'texts_per_second': self.texts / uptime if uptime else 0.0,
+            'batches': self.batches,
+            'batched_texts': self.batched_texts,
+            'mean_batch_size': self.batched_texts / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'pending_texts': pending,
+            'latency_ms': {'p50': percentile(50), 'p95': percentile(95), 'p99': percentile(99),
+                           'max': latencies[-1] * 1000 if latencies else None},
+        }
+
+class MicroBatcher:
+    """Gathers texts from concurrent callers into batches scored on one worker thread.
+
+    A batch is closed when it holds max_batch_size texts or max_wait seconds after its
+    first request arrived, whichever comes first. A request is never split, so a single
+    request larger than max_batch_size forms a batch of its own.
+    """
+
+    def __init__(self, metrics, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT_MS / 1000,
+                 max_pending=DEFAULT_MAX_PENDING, cache=None):
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.cache = cache
+        self.pending = 0
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+
+    async def score(self, texts):
+        """Return [(label, polarity), ...] for the texts, or raise Overloaded."""
+        if self.pending + len(texts) > self.max_pending:
+            raise Overloaded()
+        self.pending += len(texts)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((texts, future))
+        try:
+            return await future
+        finally:
+            self.pending -= len(texts)
+
+    def _score(self, texts):
+        labels, polarities = analyze_sentiment_batch(pd.Series(texts, dtype=object), self.cache)
+        return [(str(label), float(polarity)) for label, polarity in zip(labels, polarities)]
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch_size:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            batch.append(item)
+            size += len(item[0])
+        return batch, size
+
+    async def run(self):
+        """Score batches until cancelled."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batch, size = await self._next_batch()
+                texts = [text for item_texts, _ in batch for text in item_texts]
+                self.metrics.record_batch(size)
+                try:
+                    results = await loop.run_in_executor(self._executor, self._score, texts)
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                start = 0
+                for item_texts, future in batch:
+                    if not future.done():
+                        future.set_result(results[start:start + len(item_texts)])
+                    start += len(item_texts)
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+# ==================== HTTP ====================
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+def _response(status, payload, keep_alive, extra_headers=()):
+    body = json.dumps(payload).encode("utf-8")
+    headers = [f"HTTP/1.1 {status} {REASONS[status]}", "Content-Type: application/json",
+               f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}",
+               *extra_headers]
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body
+
+def _parse_texts(body):
+    """Return (texts, single) from a /score body, or raise ValueError with the reason."""
+    try:
+        request = json.loads(body or b"null")
+    except ValueError:
+        raise ValueError("Body must be JSON.") from None
+    if isinstance(request, dict) and "text" in request:
+        return [str(request["text"])], True
+    if isinstance(request, dict) and isinstance(request.get("texts"), list):
+        return [str(text) for text in request["texts"]], False
+    raise ValueError('Body must be {"text": ...} or {"texts": [...]}.')
+
+async def _route(method, path, body, batcher, metrics):
+    """Return (status, payload, extra headers) for one request."""
+    if path == "/health":
+        return 200, {'status': 'ok'}, ()
+    if path == "/metrics":
+        return 200, metrics.snapshot(batcher.pending), ()
+    if path != "/score":
+        return 404, {'error': f"No such endpoint: {path}"}, ()
+    if method != "POST":
+        return 405, {'error': "Use POST."}, ("Allow: POST",)
+    try:
+        texts, single = _parse_texts(body)
+    except ValueError as e:
+        return 400, {'error': str(e)}, ()
+    if len(texts) > MAX_TEXTS_PER_REQUEST:
+        return 413, {'error': f"At most {MAX_TEXTS_PER_REQUEST} texts per request."}, ()
+    start = time.perf_counter()
+    try:
+        results = await batcher.score(texts)
+    except Overloaded:
+        metrics.rejected += 1
+        return 503, {'error': "Too many texts queued; retry shortly."}, ("Retry-After: 1",)
+    except Exception as e:
+        metrics.errors += 1
+        return 500, {'error': f"Scoring failed: {e}"}, ()
+    metrics.record_request(len(texts), time.perf_counter() - start)
+    results = [{'label': label, 'polarity': polarity} for label, polarity in results]
+    return 200, results[0] if single else {'results': results}, ()
+
+async def handle_connection(reader, writer, batcher, metrics):
+    """Serve HTTP/1.1 requests on one connection until the client closes it."""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+                headers = dict((name.strip().lower(), value.strip())
+                               for name, value in (line.split(":", 1) for line in lines[1:] if line))
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                writer.write(_response(400, {'error': "Malformed request."}, False))
+                break
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            if length > MAX_BODY_BYTES:
+                writer.write(_response(413, {'error': f"Body larger than {MAX_BODY_BYTES} bytes."}, False))
+                break
+            try:
+                body = await reader.readexactly(length)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            status, payload, extra = await _route(method, target.split("?", 1)[0], body, batcher, metrics)
+            writer.write(_response(status, payload, keep_alive, extra))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+# ==================== Server ====================
+def _remove_stale_socket(path):
+    """Remove a Unix socket left behind by an earlier run; refuse to touch anything else."""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} exists and is not a socket.")
+    os.unlink(path)
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                max_wait=DEFAULT_MAX_WAIT_MS / 1000, max_pending=DEFAULT_MAX_PENDING, cache=None, ready=None):
+    """Run the service until cancelled or sent SIGTERM. ready(address) is called once it is listening."""
+    load_lexicon_index()
+    metrics = ServiceMetrics()
+    batcher = MicroBatcher(metrics, max_batch_size, max_wait, max_pending, cache)
+    batch_task = asyncio.create_task(batcher.run())
+
+    def handler(reader, writer):
+        return handle_connection(reader, writer, batcher, metrics)
+
+    if unix_path:
+        _remove_stale_socket(unix_path)
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+        address = f"unix:{unix_path}"
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        bound_host, bound_port = server.sockets[0].getsockname()[:2]
+        address = f"http://{bound_host}:{bound_port}"
+    stopped = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    except (NotImplementedError, AttributeError):
+        pass  # no signal handlers in this event loop (Windows): stop with Ctrl+C
+    if ready is not None:
+        ready(address)
+    try:
+        async with server:
+            await stopped.wait()
+    finally:
+        batch_task.cancel()
+        if unix_path:
+            _remove_stale_socket(unix_path)
+
+# ==================== Command Line ====================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve sentiment labels over local HTTP with micro-batching.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"TCP port; 0 picks a free one (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"most texts scored in one batch (default: {DEFAULT_MAX_BATCH_SIZE})")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help=f"longest a request waits for a batch to fill (default: {DEFAULT_MAX_WAIT_MS})")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help=f"texts queued before requests get 503 (default: {DEFAULT_MAX_PENDING})")
+    parser.add_argument("--cache", metavar="PATH", help="SQLite file used to cache polarities between runs")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cache = None
+    try:
+        if args.cache:
+            cache = PolarityCache(args.cache, ANALYZER_VERSION)
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_batch_size, args.max_wait_ms / 1000,
+                          args.max_pending, cache, ready=lambda address: print(f"Serving on {address}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if cache is not None:
+            cache.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
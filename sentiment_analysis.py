@@ -1,233 +1,94 @@
+import importlib
+import queue
+import sqlite3
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, filedialog, messagebox
-from matplotlib import pyplot as plt
-import pandas as pd
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from textblob import TextBlob
-from wordcloud import WordCloud
-from sklearn.preprocessing import MinMaxScaler
-
-# ==================== Analysis Functions ====================
-def analyze_sentiment(text):
-    """Analyze sentiment using TextBlob and return (sentiment, polarity)."""
-    polarity = TextBlob(str(text)).sentiment.polarity
-    if polarity > 0.1:
-        sentiment = 'Positive'
-    elif polarity < -0.1:
-        sentiment = 'Negative'
-    else:
-        sentiment = 'Neutral'
-    return sentiment, polarity
-
-def analyze_numeric_ratings(df, col):
-    """Calculate basic statistics and distribution for numeric data."""
-    results = {
-        'average': df[col].mean(),
-        'median': df[col].median(),
-        'min': df[col].min(),
-        'max': df[col].max(),
-        'distribution': df[col].value_counts().sort_index()
-    }
-    return results
-
-def generate_predefined_summary_numeric(positive_pct, neutral_pct, negative_pct, average_rating):
-    summary = "Work-Life Balance Analysis:\n"
-    summary += f"- Positive Responses: {positive_pct:.1f}%\n"
-    summary += f"- Neutral Responses: {neutral_pct:.1f}%\n"
-    summary += f"- Negative Responses: {negative_pct:.1f}%\n"
-    summary += f"- Average Score: {average_rating:.2f}/5\n\n"
-
-    if average_rating >= 4.5:
-        summary += ("Excellent overall sentiment regarding work-life balance. Employees feel highly supported and balanced.\n\n"
-                    "Recommendations:\n"
-                    "- Maintain current work-life balance initiatives.\n\n"
-                    "- Continue regular employee satisfaction checks.")
-    elif average_rating >= 4.0:
-        summary += ("Very good sentiment overall, with employees generally satisfied.\n\n"
-                    "Recommendations:\n"
-                    "- Gather feedback to pinpoint minor improvements.\n"
-                    "- Keep open communication channels.")
-    elif average_rating >= 3.5:
-        summary += ("Good sentiment overall, though some areas need improvement.\n\n"
-                    "Recommendations:\n"
-                    "- Investigate causes behind neutral/negative responses.\n"
-                    "- Offer more flexible scheduling options.")
-    elif average_rating >= 3.0:
-        summary += ("Moderate sentiment indicates mixed experiences among employees.\n\n"
-                    "Recommendations:\n"
-                    "- Introduce structured work-life balance programs (e.g., wellness initiatives).\n"
-                    "- Increase flexibility and clarity on available support.")
-    elif average_rating >= 2.5:
-        summary += ("Below average sentiment suggests significant concerns with work-life balance.\n\n"
-                    "Recommendations:\n"
-                    "- Conduct surveys to identify stressors.\n"
-                    "- Implement flexible hours, mental health days, and stress management workshops.")
-    else:
-        summary += ("Poor sentiment demonstrates severe dissatisfaction.\n\n"
-                    "Immediate Recommendations:\n"
-                    "- Hold urgent employee forums to discuss pain points.\n"
-                    "- Develop comprehensive policies with substantial flexibility and wellness support.")
-
-    # If negative responses are high, add a note.
-    if negative_pct > 30:
-        summary += "\n\nNote: A high proportion of negative responses indicates widespread dissatisfaction that should be urgently addressed."
-    return summary
-
-def generate_predefined_summary_text(sentiment_counts, avg_polarity):
-    summary = "Work-Life Balance Analysis:\n"
-    summary += f"- Sentiment Breakdown: {sentiment_counts}\n"
-    summary += f"- Average Sentiment Polarity: {avg_polarity:.2f}\n\n"
-
-    positive = sentiment_counts.get('Positive', 0)
-    neutral = sentiment_counts.get('Neutral', 0)
-    negative = sentiment_counts.get('Negative', 0)
-    total = positive + neutral + negative
-    negative_pct = (negative / total) * 100 if total else 0
-
-    if avg_polarity >= 0.5:
-        summary += ("Highly positive sentiment indicates employees feel very supported.\n\n"
-                    "Recommendations:\n"
-                    "- Maintain current positive practices and gather regular feedback.")
-    elif avg_polarity >= 0.2:
-        summary += ("Overall positive sentiment with minor issues.\n\n"
-                    "Recommendations:\n"
-                    "- Explore common neutral/negative themes and improve flexibility or wellness programs.")
-    elif avg_polarity >= 0.0:
-        summary += ("Neutral sentiment suggests mixed experiences.\n\n"
-                    "Recommendations:\n"
-                    "- Increase dialogue and introduce clear flexible working and wellness policies.")
-    elif avg_polarity >= -0.2:
-        summary += ("Negative sentiment indicates growing dissatisfaction.\n\n"
-                    "Recommendations:\n"
-                    "- Conduct detailed feedback sessions and prioritize flexible schedules and mental health resources.")
-    else:
-        summary += ("Very negative sentiment highlights critical issues.\n\n"
-                    "Urgent Recommendations:\n"
-                    "- Immediately address employee concerns with comprehensive changes and increased support.")
-    if negative_pct > 30:
-        summary += "\n\nNote: Over 30% negative responses indicate deep-rooted dissatisfaction that must be addressed promptly."
-    return summary
-
-def scale_numbers(col):
-    scaler = MinMaxScaler(feature_range=(-1,1))
-    is_numeric = pd.api.types.is_numeric_dtype(col)
-    if is_numeric:
-        col_scaled_values = scaler.fit_transform(col.values.reshape(-1,1))
-        col_scaled = pd.DataFrame(col_scaled_values, columns=["data_scaled"], index=col.index)
-        return col_scaled
-    return None
-
-# ==================== Visualization Functions ====================
-def generate_pie_chart(df):
-    """Generate a pie chart showing sentiment distribution (for text analysis)."""
-    counts = df['sentiment'].value_counts()
-    fig, ax = plt.subplots(figsize=(4, 4))
-    ax.pie(counts, labels=counts.index, autopct='%1.1f%%', startangle=90)
-    ax.set_title("Sentiment Distribution")
-    fig.text(0.5, 0.01, "Caption: This pie chart shows the percentage distribution of sentiments from the text data.", 
-    ha="center", fontsize=10)
-    return fig
-
-def generate_sentiment_pie_chart(df):
-    """Generate a pie chart showing sentiment distribution based on numeric ratings."""
-    sentiment_counts = df['rating_sentiment'].value_counts()
-    fig, ax = plt.subplots(figsize=(4, 4))
-    ax.pie(sentiment_counts, labels=sentiment_counts.index, autopct='%1.1f%%', startangle=90)
-    ax.set_title("Sentiment Distribution")
-    fig.subplots_adjust(bottom=0.25)
-    fig.text(0.5, 0.05,
-    "Caption: This pie chart represents the percentage of numeric ratings grouped into sentiment categories derived from employees' ratings.",
-     ha="center", fontsize=10)
-    return fig
-
-def generate_scatter_plot(df):
-    """Generate a scatter plot of polarity values (for text analysis) with axes switched."""
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.scatter(df['polarity'], range(len(df)), color='blue')
-    ax.set_title("Polarity Scatter Plot")
-    ax.set_xlabel("Polarity")
-    ax.set_ylabel("Data Inputs")
-    fig.subplots_adjust(bottom=0.25)
-    fig.text(0.5, 0.05,
-     "Caption: This scatter plot shows each review's sentiment polarity where each point's horizontal position represents its order and vertical position shows its polarity score.",
-      ha="center", fontsize=10)
-    return fig
-
-def generate_sentiment_scatter_plot(df):
-    """Generate a scatter plot for numeric ratings
-       x-axis: rating (1-5), y-axis: Inputs, colored by sentiment.
+from instrumentation import DISABLED, Profiler
+from polarity_cache import DEFAULT_CACHE_PATH, PolarityCache
+
+# Only tkinter and a few standard library modules are imported up front, so the window
+# appears at once. numpy, pandas, matplotlib, TextBlob and wordcloud come in with
+# sentiment_core, which prewarm() imports on a background thread once the window is up.
+
+def __getattr__(name):
+    """Keep `from sentiment_analysis import analyze_sentiment` etc. working; they live in sentiment_core."""
+    if name.startswith('__'):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import sentiment_core
+    try:
+        return getattr(sentiment_core, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+# ==================== Startup ====================
+def prewarm(cache_path=DEFAULT_CACHE_PATH):
+    """Import the analysis modules and load the sentiment lexicon and TextBlob's analyzer.
+
+    Runs on a background thread at startup so neither the window nor the first analysis
+    waits for them. Returns the polarity cache the app uses (memory-only if cache_path is
+    None).
     """
-    colors = {"Negative": "red", "Neutral": "gray", "Positive": "green"}
-    df_filtered = df[df['numeric'].between(1, 5)]
-    fig, ax = plt.subplots(figsize=(6, 4))
-    x_values = df_filtered['numeric']
-    y_values = df_filtered.index
-    ax.scatter(x_values, y_values, c=df_filtered['rating_sentiment'].map(colors), s=20)
-    ax.set_title("Scores Scatter Plot")
-    ax.set_xlabel("Score")
-    ax.set_ylabel("Data Inputs")
-    ax.set_xticks([1, 2, 3, 4, 5])
-    fig.subplots_adjust(bottom=0.25)
-    fig.text(0.5, 0.05,
-    "Caption: This scatter plot displays numeric ratings (on the x-axis) for each data input (ordered on the y-axis), with colors indicating the assigned sentiment.",
-     ha="center", fontsize=10)
-    return fig
-
-def generate_wordcloud(text, title):
-    """Generate a word cloud figure from the provided text."""
-    if not text.strip():
-        text = "No data available."
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis('off')
-    ax.set_title(title)
-    fig.text(0.5, 0.01,
-    "Caption: The word cloud visualizes the most frequent words from the text, with larger words representing higher frequencies.",
-    ha="center", fontsize=10)
-    return fig
-
-def generate_bar_chart_text(df):
-    """Generate a bar chart showing sentiment distribution for text analysis."""
-    counts = df['sentiment'].value_counts()
-    color_mapping = {"Positive": "green", "Neutral": "yellow", "Negative": "red"}
-    colors = [color_mapping.get(sentiment, "blue") for sentiment in counts.index]
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.bar(counts.index, counts.values, color=colors)
-    ax.set_title("Text Sentiment Distribution - Bar Chart")
-    ax.set_xlabel("Sentiment")
-    ax.set_ylabel("Data Inputs")
-    fig.subplots_adjust(bottom=0.25)
-    fig.text(0.5, 0.05,
-    "Caption: This bar chart shows the number of text reviews in each sentiment category (Positive, Neutral, Negative), with different colors representing each category.",
-    ha="center", fontsize=10)
-    return fig
-
-def generate_bar_chart_numeric(df):
-    """Generate a bar chart showing sentiment distribution based on numeric ratings."""
-    counts = df['rating_sentiment'].value_counts()
-    color_mapping = {"Positive": "green", "Neutral": "yellow", "Negative": "red"}
-    colors = [color_mapping.get(sentiment, "blue") for sentiment in counts.index]
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.bar(counts.index, counts.values, color=colors)
-    ax.set_title("Numeric Sentiment Distribution - Bar Chart")
-    ax.set_xlabel("Rating Sentiment")
-    ax.set_ylabel("Data inputs")
-    fig.subplots_adjust(bottom=0.25)
-    fig.text(0.5, 0.05,
-    "Caption: This bar chart illustrates how many numeric ratings fall into each sentiment category, with colors used to differentiate between Positive, Neutral, and Negative ratings.",
-    ha="center", fontsize=10)
-    return fig
+    import sentiment_core
+    # Imported only to have them loaded before draw_tab and load_data need them.
+    importlib.import_module("matplotlib.backends.backend_tkagg")
+    importlib.import_module("data_sources")
+    sentiment_core.load_lexicon_index()
+    sentiment_core.analyze_sentiment("warm up")
+    try:
+        return PolarityCache(cache_path, sentiment_core.ANALYZER_VERSION)
+    except (OSError, sqlite3.Error):
+        # Without a writable cache directory, fall back to caching for this session only.
+        return PolarityCache(None, sentiment_core.ANALYZER_VERSION)
 
 # ==================== Main Application ====================
+# How often the UI checks the analysis thread for progress and results.
+ANALYSIS_POLL_MS = 100
+# How often a tab waiting for its figure checks whether the figure has been built.
+FIGURE_POLL_MS = 50
+# Group By choice for analyzing the selected columns over all rows.
+NO_GROUP = "(none)"
+
 class SentimentApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Sentiment Analysis App")
         self.geometry("900x700")
         self.data = None
+        # Set instead of self.data when a file is loaded; only the selected column is read.
+        self.data_path = None
+        self.data_columns = []
+        self.results = None
         self.word_cloud_message = None
+        self.pending_tabs = {}
+        # Builds chart figures (word cloud layout, scatter downsampling) off the Tk thread.
+        self.figure_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="figures")
+        # Stage timings of the current load/analysis, when "Record diagnostics" is ticked.
+        self.profiler = DISABLED
+        self.load_records = []
+        self.diagnostics_tab = None
+        self.polarity_cache = None
+        # Set by start_analysis; setting the event cancels the running analysis.
+        self.cancel_event = None
         self.create_control_panel()
+        # Started once the window has been drawn; analysis_worker waits for it to finish.
+        self.prewarm_thread = threading.Thread(target=self.prewarm_worker, daemon=True)
+        self.after_idle(self.prewarm_thread.start)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def prewarm_worker(self):
+        self.polarity_cache = prewarm()
+
+    def on_close(self):
+        """Stop background work and close the polarity cache, which saves its pending last-used times."""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        self.figure_executor.shutdown(wait=False, cancel_futures=True)
+        if self.polarity_cache is not None:
+            self.polarity_cache.close()
+        self.profiler.close()
+        self.destroy()
     
     def create_control_panel(self):
         frame = ttk.Frame(self)
@@ -236,10 +97,14 @@ class SentimentApp(tk.Tk):
         self.data_source_var = tk.StringVar(value="pre")
         tk.Label(frame, text="Data Source:").grid(row=0, column=0, sticky="w")
         tk.Radiobutton(frame, text="Pre-imported", variable=self.data_source_var, value="pre").grid(row=0, column=1, padx=5)
-        tk.Radiobutton(frame, text="CSV File", variable=self.data_source_var, value="csv").grid(row=0, column=2, padx=5)
+        tk.Radiobutton(frame, text="Data File", variable=self.data_source_var, value="csv").grid(row=0, column=2, padx=5)
         tk.Radiobutton(frame, text="Manual Input", variable=self.data_source_var, value="manual").grid(row=0, column=3, padx=5)
         
         ttk.Button(frame, text="Load Data", command=self.load_data).grid(row=1, column=0, pady=5, sticky="w")
+        self.diagnostics_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame, text="Record diagnostics", variable=self.diagnostics_var).grid(row=1, column=1, padx=5, sticky="w")
+        self.trace_memory_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame, text="Trace memory (slower)", variable=self.trace_memory_var).grid(row=1, column=2, padx=5, sticky="w")
         tk.Label(frame, text="Manual Input (one entry per line):").grid(row=2, column=0, columnspan=4, sticky="w")
         self.manual_text = tk.Text(frame, height=5, width=60)
         self.manual_text.grid(row=3, column=0, columnspan=4, pady=5)
@@ -254,13 +119,39 @@ class SentimentApp(tk.Tk):
         self.column_combobox.grid(row=4, column=1, columnspan=3, sticky="we", padx=5)
         
         self.analyze_btn = ttk.Button(frame, text="Analyze", command=self.perform_analysis)
-        self.analyze_btn.grid(row=5, column=0, columnspan=4, pady=10)
+        self.analyze_btn.grid(row=5, column=0, pady=10, sticky="w")
+        self.cancel_btn = ttk.Button(frame, text="Cancel", command=self.cancel_analysis, state="disabled")
+        self.cancel_btn.grid(row=5, column=1, pady=10, padx=5, sticky="w")
+        self.progress = ttk.Progressbar(frame, mode="determinate")
+        self.progress.grid(row=5, column=2, columnspan=2, sticky="we", padx=5)
+
+        tk.Label(frame, text="Columns for Grouped Analysis:").grid(row=6, column=0, sticky="nw")
+        self.columns_listbox = tk.Listbox(frame, selectmode="multiple", exportselection=False, height=4)
+        self.columns_listbox.grid(row=6, column=1, columnspan=3, sticky="we", padx=5)
+        tk.Label(frame, text="Group By:").grid(row=7, column=0, sticky="w")
+        self.group_combobox = ttk.Combobox(frame, state="readonly")
+        self.group_combobox.grid(row=7, column=1, sticky="we", padx=5, pady=5)
+        self.group_btn = ttk.Button(frame, text="Analyze Groups", command=self.perform_group_analysis)
+        self.group_btn.grid(row=7, column=2, padx=5, pady=5, sticky="w")
         
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        self.notebook.bind("<<NotebookTabChanged>>", self.render_tab)
     
+    def new_profiler(self):
+        """Replace the current profiler: a Profiler if diagnostics are on, otherwise DISABLED."""
+        self.profiler.close()
+        if self.diagnostics_var.get():
+            self.profiler = Profiler(trace_memory=self.trace_memory_var.get())
+        else:
+            self.profiler = DISABLED
+        return self.profiler
+
     def load_data(self):
+        import pandas as pd
+        from data_sources import FILE_TYPES, read_columns
         src = self.data_source_var.get()
+        profiler = self.new_profiler()
         if src == "pre":
             sample_data = {
                 'text_reviews': [
@@ -275,136 +166,234 @@ class SentimentApp(tk.Tk):
                 ],
                 'work_life_balance': [4, 2, 5, 1, 2, 1, 3, 2]
             }
-            self.data = pd.DataFrame(sample_data)
+            with profiler.stage("load_data", rows=len(sample_data['text_reviews'])):
+                self.set_data(pd.DataFrame(sample_data))
             messagebox.showinfo("Info", "Pre-imported sample data loaded.")
         elif src == "csv":
-            file = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
+            file = filedialog.askopenfilename(filetypes=FILE_TYPES)
             if file:
                 try:
-                    self.data = pd.read_csv(file)
-                    messagebox.showinfo("Info", f"CSV data loaded from {file}.")
+                    # Only the column names are read here (from the header or file metadata).
+                    with profiler.stage("load_data"):
+                        columns = read_columns(file)
                 except Exception as e:
-                    messagebox.showerror("Error", f"Failed to load CSV: {e}")
+                    messagebox.showerror("Error", f"Failed to load file: {e}")
                     return
+                self.data = None
+                self.data_path = file
+                self.data_columns = columns
+                messagebox.showinfo("Info", f"Data file loaded from {file}.")
         elif src == "manual":
             text_input = self.manual_text.get("1.0", "end-1c").strip()
             if text_input:
-                lines = text_input.splitlines()
-                self.data = pd.DataFrame({"text": lines})
+                with profiler.stage("load_data") as stage:
+                    lines = text_input.splitlines()
+                    self.set_data(pd.DataFrame({"text": lines}))
+                    stage.rows = len(lines)
                 messagebox.showinfo("Info", "Manual input data loaded.")
             else:
                 messagebox.showwarning("Warning", "No manual input provided.")
                 return
+        self.load_records = list(profiler.records)
         self.update_column_options()
     
+    def set_data(self, data):
+        self.data = data
+        self.data_path = None
+        self.data_columns = list(data.columns)
+
     def update_column_options(self):
-        if self.data is not None:
-            cols = list(self.data.columns)
-            self.column_combobox['values'] = cols
-            if cols:
-                self.column_combobox.current(0)
+        cols = self.data_columns
+        self.column_combobox['values'] = cols
+        if cols:
+            self.column_combobox.current(0)
+        self.columns_listbox.delete(0, tk.END)
+        for col in cols:
+            self.columns_listbox.insert(tk.END, col)
+        self.group_combobox['values'] = [NO_GROUP] + cols
+        self.group_combobox.current(0)
     
     def perform_analysis(self):
+        if self.data is None and self.data_path is None:
+            messagebox.showerror("Error", "Load data before analyzing.")
+            return
         selected_col = self.column_combobox.get()
-        if not selected_col or selected_col not in self.data.columns:
+        if not selected_col or selected_col not in self.data_columns:
             messagebox.showerror("Error", "Selected column not found.")
             return
-        
-        col_series = self.data[selected_col].astype(str)
-        #more than 80% of values are percents
-        is_percent = col_series.str.contains('%').mean() > 0.8
 
-        #checks if value is percent. converts to float if true
-        if is_percent:
-            numeric_vals = col_series.str.rstrip('%').astype(float) / 100.0
-        else:
-            numeric_vals = pd.to_numeric(self.data[selected_col], errors='coerce')
+        def analyze(data, **options):
+            from sentiment_core import run_analysis
+            return run_analysis(data, selected_col, self.polarity_cache, **options)
 
-        numeric_ratio = numeric_vals.notnull().mean()
-        
-        if numeric_ratio > 0.8:
-            self.data['numeric'] = numeric_vals
-            #scales data between -1,1
-            self.data['scaled'] = scale_numbers(numeric_vals)
-            self.data['rating_sentiment'] = self.data['scaled'].apply(
-                lambda x: "Negative" if x <= -0.1 else "Neutral" if x <= 0.1 else "Positive"
-            )
-            
-            fig_pie = generate_sentiment_pie_chart(self.data)
-            fig_scatter = generate_sentiment_scatter_plot(self.data)
-            fig_bar = generate_bar_chart_numeric(self.data)
-            self.word_cloud_message = "Data analyzed was numerical, so no word cloud was generated."
-            
-            sentiment_counts = self.data['rating_sentiment'].value_counts()
-            total = sentiment_counts.sum()
-            positive_pct = (sentiment_counts.get("Positive", 0) / total) * 100
-            neutral_pct = (sentiment_counts.get("Neutral", 0) / total) * 100
-            negative_pct = (sentiment_counts.get("Negative", 0) / total) * 100
-            avg_rating = self.data['numeric'].mean()
-            summary = generate_predefined_summary_numeric(positive_pct, neutral_pct, negative_pct, avg_rating)
+        self.start_analysis(self.data_loader([selected_col]), analyze, 1, self.show_analysis)
+
+    def perform_group_analysis(self):
+        """Analyze every selected column, per group of the Group By column, in one run."""
+        if self.data is None and self.data_path is None:
+            messagebox.showerror("Error", "Load data before analyzing.")
+            return
+        columns = [self.columns_listbox.get(i) for i in self.columns_listbox.curselection()]
+        if not columns:
+            messagebox.showerror("Error", "Select one or more columns for grouped analysis.")
+            return
+        group = self.group_combobox.get()
+        group_by = None if group in ("", NO_GROUP) else group
+
+        def analyze(data, **options):
+            from sentiment_core import analyze_columns
+            return analyze_columns(data, columns, group_by, self.polarity_cache, **options)
+
+        needed = columns + [group_by] if group_by else columns
+        self.start_analysis(self.data_loader(needed), analyze, len(columns), self.display_group_results)
+
+    def data_loader(self, columns):
+        """Return a function the analysis thread calls to get just these columns of the data.
+
+        Files are read in chunks: load(report, check_cancelled) passes the rows read so far
+        to report and calls check_cancelled between chunks, so Cancel stops a long read too.
+        """
+        if self.data_path is None:
+            frame = self.data[list(dict.fromkeys(columns))]
+            return lambda report, check_cancelled: frame
+        path = self.data_path
+
+        def load(report, check_cancelled):
+            import pandas as pd
+            from data_sources import iter_frame_chunks, read_frame
+            chunks = []
+            rows = 0
+            for chunk in iter_frame_chunks(path, columns):
+                check_cancelled()
+                chunks.append(chunk)
+                rows += len(chunk)
+                report(rows)
+            if not chunks:
+                return read_frame(path, columns)
+            return pd.concat(chunks, ignore_index=True)
+
+        return load
+
+    def start_analysis(self, load, analyze, columns, on_done):
+        """Run analyze(load(...)) on a background thread and pass its result to on_done.
+
+        load is a function from data_loader; columns is how many columns analyze processes,
+        to size the progress bar.
+        """
+        self.analyze_btn.config(state="disabled")
+        self.group_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
+        self.progress.config(value=0)
+        self.analysis_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        profiler = self.new_profiler()
+        profiler.records.extend(self.load_records)
+        worker = threading.Thread(target=self.analysis_worker, daemon=True,
+                                  args=(load, analyze, columns, self.analysis_queue, self.cancel_event, profiler))
+        worker.start()
+        self.after(ANALYSIS_POLL_MS, self.poll_analysis, self.analysis_queue, on_done)
+
+    def analysis_worker(self, load, analyze, columns, results_queue, cancel_event, profiler):
+        """Runs on a background thread; talks to the UI only through results_queue."""
+        self.prewarm_thread.join()
+        try:
+            from sentiment_core import AnalysisCancelled, run_hooks
+        except ImportError as e:
+            results_queue.put(("error", e))
+            return
+        report, check_cancelled = run_hooks(lambda rows: results_queue.put(("reading", rows)), cancel_event)
+        try:
+            with profiler.stage("perform_analysis") as stage:
+                with profiler.stage("read_data") as read:
+                    data = load(report, check_cancelled)
+                    read.rows = stage.rows = len(data)
+                check_cancelled()
+                results_queue.put(("rows", len(data) * columns))
+                outcome = analyze(data, progress=lambda rows: results_queue.put(("progress", rows)),
+                                  cancel_event=cancel_event, profiler=profiler)
+            results_queue.put(("done", outcome))
+        except AnalysisCancelled:
+            results_queue.put(("cancelled", None))
+        except Exception as e:
+            results_queue.put(("error", e))
+
+    def poll_analysis(self, results_queue, on_done):
+        while True:
+            try:
+                kind, payload = results_queue.get_nowait()
+            except queue.Empty:
+                self.after(ANALYSIS_POLL_MS, self.poll_analysis, results_queue, on_done)
+                return
+            if kind == "reading":
+                # The number of rows is unknown until the file has been read.
+                self.progress.config(mode="indeterminate")
+                self.progress.step()
+                continue
+            if kind == "rows":
+                self.progress.config(mode="determinate", maximum=max(payload, 1), value=0)
+                continue
+            if kind == "progress":
+                self.progress.config(value=payload)
+                continue
+            break
+
+        self.analyze_btn.config(state="normal")
+        self.group_btn.config(state="normal")
+        self.cancel_btn.config(state="disabled")
+        self.progress.config(mode="determinate")
+        if kind == "error":
+            self.progress.config(value=0)
+            messagebox.showerror("Error", f"Analysis failed: {payload}")
+        elif kind == "cancelled":
+            self.progress.config(value=0)
         else:
-            self.data['sentiment'], self.data['polarity'] = zip(*self.data[selected_col].apply(analyze_sentiment))
-            fig_pie = generate_pie_chart(self.data)
-            fig_scatter = generate_scatter_plot(self.data)
-            fig_bar = generate_bar_chart_text(self.data)
-            pos_text = ' '.join(self.data[self.data['sentiment'] == 'Positive'][selected_col].dropna().astype(str))
-            neg_text = ' '.join(self.data[self.data['sentiment'] == 'Negative'][selected_col].dropna().astype(str))
-            self.fig_pos_wc = generate_wordcloud(pos_text, "Positive Word Cloud")
-            self.fig_neg_wc = generate_wordcloud(neg_text, "Negative Word Cloud")
-            self.word_cloud_message = None
-            sentiment_counts = self.data['sentiment'].value_counts().to_dict()
-            avg_polarity = self.data['polarity'].mean()
-            summary = generate_predefined_summary_text(sentiment_counts, avg_polarity)
-        
-        self.display_results(fig_pie, fig_scatter, fig_bar, summary)
+            on_done(payload)
+
+    def show_analysis(self, outcome):
+        self.results = outcome['results']
+        self.word_cloud_message = outcome['word_cloud_message']
+        self.display_results(outcome['charts'], outcome['summary'])
+
+    def cancel_analysis(self):
+        self.cancel_event.set()
+        self.cancel_btn.config(state="disabled")
     
-    def display_results(self, fig_pie, fig_scatter, fig_bar, summary):
+    def display_results(self, charts, summary):
+        """Add a tab per chart plus the word cloud message, summary and diagnostics tabs.
+
+        Chart tabs start empty; the first time one is selected, render_tab has its figure
+        built on a background thread and draws it once it is ready. The canvas stays in the
+        tab so switching back costs nothing.
+        """
+        with self.profiler.stage("display_results"):
+            self.add_result_tabs(charts, summary)
+
+    def clear_tabs(self):
+        # Cleared first so tab changes fired while old tabs are destroyed render nothing.
+        self.pending_tabs = {}
+        self.diagnostics_tab = None
         for child in self.notebook.winfo_children():
             child.destroy()
+
+    def add_diagnostics_tab(self):
+        """Add the Diagnostics tab, filled in (and refreshed) whenever it is selected."""
+        if self.profiler.enabled:
+            frame_diag = ttk.Frame(self.notebook)
+            self.notebook.add(frame_diag, text="Diagnostics")
+            self.diagnostics_tab = str(frame_diag)
+
+    def add_result_tabs(self, charts, summary):
+        self.clear_tabs()
+        for title, build in charts:
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=title)
+            self.pending_tabs[str(frame)] = build
         
-        # Pie Chart Tab.
-        frame_pie = ttk.Frame(self.notebook)
-        self.notebook.add(frame_pie, text="Pie Chart")
-        canvas1 = FigureCanvasTkAgg(fig_pie, master=frame_pie)
-        canvas1.draw()
-        canvas1.get_tk_widget().pack(fill='both', expand=True)
-        plt.close(fig_pie)
-        
-        # Scatter Plot Tab.
-        frame_scatter = ttk.Frame(self.notebook)
-        self.notebook.add(frame_scatter, text="Scatter Plot")
-        canvas2 = FigureCanvasTkAgg(fig_scatter, master=frame_scatter)
-        canvas2.draw()
-        canvas2.get_tk_widget().pack(fill='both', expand=True)
-        plt.close(fig_scatter)
-
-        # Bar Chart Tab.
-        frame_bar = ttk.Frame(self.notebook)
-        self.notebook.add(frame_bar, text="Bar Chart")
-        canvas_bar = FigureCanvasTkAgg(fig_bar, master=frame_bar)
-        canvas_bar.draw()
-        canvas_bar.get_tk_widget().pack(fill='both', expand=True)
-        plt.close(fig_bar)
-        
-        # Word Cloud Tab(s) or Message.
+        # Word Cloud Message.
         if self.word_cloud_message:
             frame_wc = ttk.Frame(self.notebook)
             self.notebook.add(frame_wc, text="Word Cloud")
             tk.Label(frame_wc, text=self.word_cloud_message, font=("Arial", 14)).pack(expand=True, fill='both', padx=10, pady=10)
-        else:
-            frame_pos = ttk.Frame(self.notebook)
-            self.notebook.add(frame_pos, text="Positive Word Cloud")
-            canvas_pos = FigureCanvasTkAgg(self.fig_pos_wc, master=frame_pos)
-            canvas_pos.draw()
-            canvas_pos.get_tk_widget().pack(fill='both', expand=True)
-            plt.close(self.fig_pos_wc)
-            
-            frame_neg = ttk.Frame(self.notebook)
-            self.notebook.add(frame_neg, text="Negative Word Cloud")
-            canvas_neg = FigureCanvasTkAgg(self.fig_neg_wc, master=frame_neg)
-            canvas_neg.draw()
-            canvas_neg.get_tk_widget().pack(fill='both', expand=True)
-            plt.close(self.fig_neg_wc)
         
         # Summary Tab.
         frame_sum = ttk.Frame(self.notebook)
@@ -414,6 +403,117 @@ class SentimentApp(tk.Tk):
         text_widget.config(state="disabled")
         text_widget.pack(fill='both', expand=True)
 
+        self.add_diagnostics_tab()
+        self.notebook.select(0)
+        self.render_tab()
+
+    def display_group_results(self, groups):
+        """Show one table row per analyzed column and group; selecting a row shows its summary."""
+        self.results = groups
+        with self.profiler.stage("display_results", rows=len(groups)):
+            self.clear_tabs()
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text="Grouped Results")
+            table = ttk.Frame(frame)
+            table.pack(fill='both', expand=True)
+            headings = ["Column", "Group", "Mode", "Rows", "Negative", "Neutral", "Positive", "Average"]
+            tree = ttk.Treeview(table, columns=headings, show="headings", height=12)
+            for heading in headings:
+                tree.heading(heading, text=heading)
+                tree.column(heading, width=90, anchor="w" if heading in ("Column", "Group", "Mode") else "e")
+            scrollbar = ttk.Scrollbar(table, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scrollbar.set)
+            scrollbar.pack(side='right', fill='y')
+            tree.pack(side='left', fill='both', expand=True)
+            for i, row in enumerate(groups.itertuples(index=False)):
+                tree.insert("", tk.END, iid=str(i), values=(
+                    row.column, row.group, row.mode, row.rows, row.Negative, row.Neutral, row.Positive,
+                    f"{row.average:.2f}"))
+
+            text_widget = tk.Text(frame, wrap='word', font=("Arial", 12), height=10)
+            text_widget.pack(fill='both', expand=True)
+            text_widget.insert(tk.END, "Select a row to see its summary.")
+            text_widget.config(state="disabled")
+
+            def show_summary(event):
+                selection = tree.selection()
+                if not selection:
+                    return
+                text_widget.config(state="normal")
+                text_widget.delete("1.0", tk.END)
+                text_widget.insert(tk.END, groups['summary'].iloc[int(selection[0])])
+                text_widget.config(state="disabled")
+
+            tree.bind("<<TreeviewSelect>>", show_summary)
+            self.add_diagnostics_tab()
+            self.notebook.select(0)
+
+    def render_tab(self, event=None):
+        """Start building the selected tab's figure in the background if it has not been rendered yet."""
+        selected = self.notebook.select()
+        if selected and selected == self.diagnostics_tab:
+            self.show_diagnostics(self.nametowidget(selected))
+            return
+        build = self.pending_tabs.pop(selected, None)
+        if build is None:
+            return
+        frame = self.nametowidget(selected)
+        title = self.notebook.tab(selected, 'text')
+        placeholder = tk.Label(frame, text="Rendering...", font=("Arial", 14))
+        placeholder.pack(expand=True, fill='both')
+        profiler = self.profiler
+
+        def build_figure():
+            with profiler.stage(f"build_figure[{title}]"):
+                return build()
+
+        future = self.figure_executor.submit(build_figure)
+        self.after(FIGURE_POLL_MS, self.draw_tab, future, frame, placeholder, title, profiler)
+
+    def draw_tab(self, future, frame, placeholder, title, profiler):
+        """Draw the figure render_tab started building once it is ready (the Tk-thread part)."""
+        if not future.done():
+            self.after(FIGURE_POLL_MS, self.draw_tab, future, frame, placeholder, title, profiler)
+            return
+        if not frame.winfo_exists():
+            return  # The results were replaced while the figure was being built.
+        placeholder.destroy()
+        try:
+            fig = future.result()
+        except Exception as e:
+            tk.Label(frame, text=f"Failed to render {title}: {e}").pack(expand=True, fill='both')
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        with profiler.stage(f"render_tab[{title}]"):
+            canvas = FigureCanvasTkAgg(fig, master=frame)
+            canvas.draw()
+        canvas.get_tk_widget().pack(fill='both', expand=True)
+
+    def show_diagnostics(self, frame):
+        """Show the per-stage timings recorded so far, with buttons to export them."""
+        for child in frame.winfo_children():
+            child.destroy()
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill='x', padx=5, pady=5)
+        ttk.Button(buttons, text="Export JSON...",
+                   command=lambda: self.export_diagnostics(self.profiler.export_json)).pack(side='left')
+        ttk.Button(buttons, text="Export Chrome Trace...",
+                   command=lambda: self.export_diagnostics(self.profiler.export_chrome_trace)).pack(side='left', padx=5)
+        tk.Label(buttons, text="Rendered tabs are added as they are first shown.").pack(side='left', padx=5)
+        text_widget = tk.Text(frame, wrap='none', font=("Courier", 10))
+        text_widget.insert(tk.END, self.profiler.format_summary())
+        text_widget.config(state="disabled")
+        text_widget.pack(fill='both', expand=True)
+
+    def export_diagnostics(self, export):
+        file = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        if not file:
+            return
+        try:
+            export(file)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export diagnostics: {e}")
+
     def add_placeholder(self, manual_text, placeholder_text):
         manual_text.insert("1.0", placeholder_text)
         manual_text.tag_add("placeholder", "1.0", "end")
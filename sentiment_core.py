@@ -0,0 +1,875 @@
+"""Analysis, chart and pipeline functions behind the sentiment analysis app.
+
+Kept apart from the Tk application in sentiment_analysis.py because importing them pulls
+in numpy, pandas, matplotlib, TextBlob and wordcloud, which takes seconds; the app imports
+this module on a background thread after its window is up. The headless engine and the
+benchmarks import it directly.
+"""
+import os
+import re
+from importlib.metadata import version
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from matplotlib import rcParams
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
+from textblob._text import EMOTICONS, PUNCTUATION
+from wordcloud import STOPWORDS, WordCloud
+from instrumentation import DISABLED
+
+# ==================== Analysis Functions ====================
+def analyze_sentiment(text):
+    """Analyze sentiment using TextBlob and return (sentiment, polarity)."""
+    polarity = TextBlob(str(text)).sentiment.polarity
+    if polarity > 0.1:
+        sentiment = 'Positive'
+    elif polarity < -0.1:
+        sentiment = 'Negative'
+    else:
+        sentiment = 'Neutral'
+    return sentiment, polarity
+
+# Part of every polarity cache key; bump it whenever scoring changes.
+ANALYZER_VERSION = f"pattern-{version('textblob')}/1"
+
+# Lexicon index used by analyze_sentiment_batch, built once from TextBlob's pattern lexicon.
+_LEXICON_INDEX = None
+
+def load_lexicon_index():
+    """Return {word: (polarity, intensity, is_modifier)} and {emoticon: polarity} for TextBlob's
+    pattern analyzer as plain dicts, so scoring avoids the lazy-dict lookups of the original."""
+    global _LEXICON_INDEX
+    if _LEXICON_INDEX is None:
+        len(pattern_sentiment)  # Forces the lazy XML lexicon to load.
+        words = {}
+        for word, tags in dict.items(pattern_sentiment):
+            if None in tags:
+                polarity, _, intensity = tags[None]
+                is_modifier = any(tag in tags for tag in pattern_sentiment.modifiers)
+                words[word] = (polarity, intensity, is_modifier)
+        emoticons = {}
+        for (_, polarity), faces in EMOTICONS.items():
+            for face in faces:
+                emoticons.setdefault(face.lower(), polarity)
+        _LEXICON_INDEX = (words, emoticons)
+    return _LEXICON_INDEX
+
+def _assess_polarities(words, lexicon, emoticons):
+    """Return the polarity of every assessment TextBlob's pattern analyzer makes for the
+    lowercased tokens, following its modifier ("very good"), negation ("not good"),
+    exclamation and emoticon rules."""
+    negations = pattern_sentiment.negations
+    assessments = []  # [polarity, intensity, negated]
+    modifier = None
+    negation = None
+    for w in words:
+        entry = lexicon.get(w)
+        if entry is not None:
+            polarity, intensity, is_modifier = entry
+            if modifier is None:
+                assessments.append([polarity, intensity, False])
+            else:
+                last = assessments[-1]
+                last[0] = max(-1.0, min(polarity * last[1], +1.0))
+                last[1] = intensity
+            if negation is not None:
+                assessments[-1][1] = 1.0 / assessments[-1][1]
+                assessments[-1][2] = True
+            modifier = w if is_modifier else None
+            negation = w if w in negations else None
+        else:
+            if w in negations:
+                negation = w
+            elif negation and len(w.strip("'")) > 1:
+                negation = None
+            if negation is not None and modifier is not None and pattern_sentiment.modifier(modifier):
+                assessments[-1][2] = True
+                negation = None
+            elif modifier and len(w) > 2:
+                modifier = None
+            if w == "!" and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, +1.0))
+            if w == "(!)":
+                assessments.append([0.0, 1.0, False])
+            if w.isalpha() is False and len(w) <= 5 and w not in PUNCTUATION and w in emoticons:
+                assessments.append([emoticons[w], 1.0, False])
+    return [p * -0.5 if negated else p for p, _, negated in assessments]
+
+# Categories of the compact label columns in run_analysis results.
+SENTIMENT_LABELS = ['Negative', 'Neutral', 'Positive']
+
+def label_polarities(polarities):
+    """Label an array of polarities with the analyze_sentiment thresholds in one step."""
+    return np.select([polarities > 0.1, polarities < -0.1], ['Positive', 'Negative'], default='Neutral')
+
+def score_texts(texts):
+    """Return an array with the pattern-analyzer polarity of each text in a list."""
+    lexicon, emoticons = load_lexicon_index()
+    scores, owners = [], []
+    for i, text in enumerate(texts):
+        words = [w.lower() for w in " ".join(pattern_sentiment.tokenizer(text)).split()]
+        found = _assess_polarities(words, lexicon, emoticons)
+        scores.extend(found)
+        owners.extend([i] * len(found))
+    owners = np.asarray(owners, dtype=np.intp)
+    totals = np.bincount(owners, weights=np.asarray(scores, dtype=float), minlength=len(texts))
+    sizes = np.bincount(owners, minlength=len(texts))
+    return totals / np.maximum(sizes, 1)
+
+def _distinct_texts(series):
+    """Return (codes, texts): the distinct values of a column as strings and each row's index into them."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes, [str(value) for value in uniques]
+
+def _cached_polarities(texts, cache, score):
+    """Return the polarity of each text, calling score() only for texts missing from the cache."""
+    if cache is None:
+        return score(texts)
+    cached = cache.get_many(texts)
+    polarities = np.array([0.0 if p is None else p for p in cached])
+    missing = [i for i, p in enumerate(cached) if p is None]
+    if missing:
+        missing_texts = [texts[i] for i in missing]
+        fresh = score(missing_texts)
+        polarities[missing] = fresh
+        cache.put_many(missing_texts, fresh)
+    return polarities
+
+def analyze_sentiment_batch(series, cache=None):
+    """Score a whole column at once and return (labels, polarities) as arrays.
+
+    Gives the same polarities as analyze_sentiment (TextBlob's pattern analyzer), but each
+    distinct text is tokenized and assessed only once, against a precompiled lexicon index,
+    and the per-text averages and labels are computed with array operations. With a
+    PolarityCache, texts seen in earlier runs are not scored again.
+    """
+    codes, texts = _distinct_texts(series)
+    polarities = _cached_polarities(texts, cache, score_texts)[codes]
+    return label_polarities(polarities), polarities
+
+# Columns shorter than this are scored in-process; starting a pool costs more than it saves.
+PARALLEL_MIN_ROWS = 100_000
+
+def create_scoring_pool(workers=None):
+    """Start a process pool whose workers each load the lexicon index once, up front."""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=load_lexicon_index)
+
+def _submit_to_pool(texts, workers, executor):
+    """Submit shards of texts to be scored in the pool; returns a function that waits for them."""
+    # A few shards per worker keeps every core busy when some shards hold longer texts.
+    n_shards = max(1, min(len(texts), (workers or os.cpu_count()) * 4))
+    bounds = np.linspace(0, len(texts), n_shards + 1).astype(int)
+    futures = [executor.submit(score_texts, texts[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])
+               if stop > start]
+    return lambda: np.concatenate([np.empty(0)] + [future.result() for future in futures])
+
+def _score_in_pool(texts, workers, executor):
+    return _submit_to_pool(texts, workers, executor)()
+
+def analyze_sentiment_parallel(series, workers=None, executor=None, cache=None):
+    """Like analyze_sentiment_batch, but the distinct texts are split into shards that are
+    scored in a process pool. Results come back in the original row order and are
+    identical to the serial path.
+
+    Pass an executor from create_scoring_pool (and the same `workers`) to reuse one pool
+    across calls; otherwise a pool with `workers` processes (default: one per core) is
+    started for this call.
+    """
+    if executor is None:
+        with create_scoring_pool(workers) as pool:
+            return analyze_sentiment_parallel(series, workers, pool, cache)
+
+    codes, texts = _distinct_texts(series)
+    score = lambda missing: _score_in_pool(missing, workers, executor)
+    polarities = _cached_polarities(texts, cache, score)[codes]
+    return label_polarities(polarities), polarities
+
+def submit_sentiment_parallel(series, executor, workers=None, cache=None):
+    """Start scoring series in the pool like analyze_sentiment_parallel does, without waiting.
+
+    Returns a function that waits for the pool and returns (labels, polarities), so the
+    caller can get on with other work while the column is scored.
+    """
+    codes, texts = _distinct_texts(series)
+    cached = cache.get_many(texts) if cache is not None else [None] * len(texts)
+    polarities = np.array([0.0 if p is None else p for p in cached])
+    missing = [i for i, p in enumerate(cached) if p is None]
+    missing_texts = [texts[i] for i in missing]
+    scored = _submit_to_pool(missing_texts, workers, executor)
+
+    def result():
+        fresh = scored()
+        if missing:
+            polarities[missing] = fresh
+            if cache is not None:
+                cache.put_many(missing_texts, fresh)
+        chunk_polarities = polarities[codes]
+        return label_polarities(chunk_polarities), chunk_polarities
+    return result
+
+# Same token pattern WordCloud.process_text uses.
+WORD_PATTERN = re.compile(r"\w[\w']*")
+
+def tokenize_words(text, stopwords=STOPWORDS):
+    """Split text into words like WordCloud does: drop "'s", numbers and stopwords."""
+    words = []
+    for word in WORD_PATTERN.findall(text):
+        if word.lower().endswith("'s"):
+            word = word[:-2]
+        if word.isdigit() or (stopwords and word.lower() in stopwords):
+            continue
+        words.append(word)
+    return words
+
+def count_sentiment_words(series, labels, counters, stopwords=STOPWORDS):
+    """Add the word counts of each row's text to counters[label], for the labels in counters.
+
+    Meant to run on the same chunk as the scoring, so word clouds never need the whole
+    column joined into one string. Each distinct text is tokenized only once and its
+    words counted as many times as it occurs; missing values are skipped.
+    """
+    codes, uniques = pd.factorize(series)
+    labels = np.asarray(labels)
+    for label, counter in counters.items():
+        occurrences = np.bincount(codes[(labels == label) & (codes >= 0)], minlength=len(uniques))
+        for i in np.flatnonzero(occurrences):
+            n = int(occurrences[i])
+            for word in tokenize_words(str(uniques[i]), stopwords):
+                counter[word] += n
+    return counters
+
+def merge_word_forms(counts):
+    """Fold case variants and simple plurals together, as WordCloud.process_text does.
+
+    Each word is kept in its most common capitalization, and "words" is merged into
+    "word" when both occur (but "class" is left alone).
+    """
+    forms = {}
+    for word, n in counts.items():
+        case_counts = forms.setdefault(word.lower(), {})
+        case_counts[word] = case_counts.get(word, 0) + n
+    for key in list(forms):
+        if key.endswith('s') and not key.endswith('ss') and key[:-1] in forms:
+            singular = forms[key[:-1]]
+            for word, n in forms.pop(key).items():
+                singular[word[:-1]] = singular.get(word[:-1], 0) + n
+    return {max(case_counts.items(), key=itemgetter(1))[0]: sum(case_counts.values())
+            for case_counts in forms.values()}
+
+def word_frequencies(text, stopwords=STOPWORDS):
+    """Return {word: count} for a piece of text, the way WordCloud would count it."""
+    return merge_word_forms(Counter(tokenize_words(text, stopwords)))
+
+def analyze_numeric_ratings(df, col):
+    """Calculate basic statistics and distribution for numeric data."""
+    values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+    distinct, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+    return rating_stats(distinct, counts)
+
+def rating_stats(distinct, counts):
+    """Statistics of analyze_numeric_ratings from sorted distinct values and their counts.
+
+    Works from the distribution alone, so it can combine counts gathered chunk by chunk.
+    """
+    distinct = np.asarray(distinct, dtype=float)
+    counts = np.asarray(counts, dtype=np.int64)
+    total = counts.sum()
+    if total == 0:
+        nan = float('nan')
+        return {'average': nan, 'median': nan, 'min': nan, 'max': nan,
+                'distribution': pd.Series(dtype='int64')}
+    cumulative = np.cumsum(counts)
+    # The median is the mean of the two middle positions (the same one when total is odd).
+    middle = np.searchsorted(cumulative, [(total - 1) // 2, total // 2], side='right')
+    return {
+        'average': float((distinct * counts).sum() / total),
+        'median': float(distinct[middle].mean()),
+        'min': float(distinct[0]),
+        'max': float(distinct[-1]),
+        'distribution': pd.Series(counts, index=distinct),
+    }
+
+def parse_numeric_column(series):
+    """Detect whether a column holds percentages and parse it; returns (values, is_percent).
+
+    Like perform_analysis, more than 80% of values containing '%' means percentages,
+    which are divided by 100. Columns that already have a numeric dtype skip the string
+    conversion entirely. Values that do not parse become NaN.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float), False
+    text = series.astype(str)
+    is_percent = len(text) > 0 and text.str.contains('%', regex=False).mean() > 0.8
+    if is_percent:
+        return pd.to_numeric(text.str.rstrip('%'), errors='coerce') / 100.0, True
+    return pd.to_numeric(series, errors='coerce'), False
+
+def label_ratings(scaled):
+    """Label an array of ratings scaled to [-1, 1] in one step.
+
+    Ratings up to -0.1 are 'Negative', up to 0.1 'Neutral' and above that 'Positive'.
+    Missing values fail both comparisons and are labelled 'Positive'.
+    """
+    scaled = np.asarray(scaled, dtype=float)
+    return np.select([scaled <= -0.1, scaled <= 0.1], ['Negative', 'Neutral'], default='Positive')
+
+def analyze_numeric_column(series):
+    """Vectorized numeric analysis of a column, or None if it is not numeric.
+
+    The column counts as numeric when more than 80% of its values parse. Returns a dict with
+    the parsed values, whether they were percentages, the values scaled to [-1, 1], their
+    sentiment labels, and the analyze_numeric_ratings statistics.
+    """
+    numeric, is_percent = parse_numeric_column(series)
+    values = numeric.to_numpy(dtype=float)
+    valid = values[~np.isnan(values)]
+    if len(values) == 0 or len(valid) / len(values) <= 0.8:
+        return None
+    distinct, counts = np.unique(valid, return_counts=True)
+    scaled = scale_to_range(values, distinct[0], distinct[-1])
+    return {
+        'numeric': numeric,
+        'is_percent': is_percent,
+        'scaled': scaled,
+        'labels': label_ratings(scaled),
+        'stats': rating_stats(distinct, counts),
+    }
+
+def generate_predefined_summary_numeric(positive_pct, neutral_pct, negative_pct, average_rating):
+    summary = "Work-Life Balance Analysis:\n"
+    summary += f"- Positive Responses: {positive_pct:.1f}%\n"
+    summary += f"- Neutral Responses: {neutral_pct:.1f}%\n"
+    summary += f"- Negative Responses: {negative_pct:.1f}%\n"
+    summary += f"- Average Score: {average_rating:.2f}/5\n\n"
+
+    if average_rating >= 4.5:
+        summary += ("Excellent overall sentiment regarding work-life balance. Employees feel highly supported and balanced.\n\n"
+                    "Recommendations:\n"
+                    "- Maintain current work-life balance initiatives.\n\n"
+                    "- Continue regular employee satisfaction checks.")
+    elif average_rating >= 4.0:
+        summary += ("Very good sentiment overall, with employees generally satisfied.\n\n"
+                    "Recommendations:\n"
+                    "- Gather feedback to pinpoint minor improvements.\n"
+                    "- Keep open communication channels.")
+    elif average_rating >= 3.5:
+        summary += ("Good sentiment overall, though some areas need improvement.\n\n"
+                    "Recommendations:\n"
+                    "- Investigate causes behind neutral/negative responses.\n"
+                    "- Offer more flexible scheduling options.")
+    elif average_rating >= 3.0:
+        summary += ("Moderate sentiment indicates mixed experiences among employees.\n\n"
+                    "Recommendations:\n"
+                    "- Introduce structured work-life balance programs (e.g., wellness initiatives).\n"
+                    "- Increase flexibility and clarity on available support.")
+    elif average_rating >= 2.5:
+        summary += ("Below average sentiment suggests significant concerns with work-life balance.\n\n"
+                    "Recommendations:\n"
+                    "- Conduct surveys to identify stressors.\n"
+                    "- Implement flexible hours, mental health days, and stress management workshops.")
+    else:
+        summary += ("Poor sentiment demonstrates severe dissatisfaction.\n\n"
+                    "Immediate Recommendations:\n"
+                    "- Hold urgent employee forums to discuss pain points.\n"
+                    "- Develop comprehensive policies with substantial flexibility and wellness support.")
+
+    # If negative responses are high, add a note.
+    if negative_pct > 30:
+        summary += "\n\nNote: A high proportion of negative responses indicates widespread dissatisfaction that should be urgently addressed."
+    return summary
+
+def generate_predefined_summary_text(sentiment_counts, avg_polarity):
+    summary = "Work-Life Balance Analysis:\n"
+    summary += f"- Sentiment Breakdown: {sentiment_counts}\n"
+    summary += f"- Average Sentiment Polarity: {avg_polarity:.2f}\n\n"
+
+    positive = sentiment_counts.get('Positive', 0)
+    neutral = sentiment_counts.get('Neutral', 0)
+    negative = sentiment_counts.get('Negative', 0)
+    total = positive + neutral + negative
+    negative_pct = (negative / total) * 100 if total else 0
+
+    if avg_polarity >= 0.5:
+        summary += ("Highly positive sentiment indicates employees feel very supported.\n\n"
+                    "Recommendations:\n"
+                    "- Maintain current positive practices and gather regular feedback.")
+    elif avg_polarity >= 0.2:
+        summary += ("Overall positive sentiment with minor issues.\n\n"
+                    "Recommendations:\n"
+                    "- Explore common neutral/negative themes and improve flexibility or wellness programs.")
+    elif avg_polarity >= 0.0:
+        summary += ("Neutral sentiment suggests mixed experiences.\n\n"
+                    "Recommendations:\n"
+                    "- Increase dialogue and introduce clear flexible working and wellness policies.")
+    elif avg_polarity >= -0.2:
+        summary += ("Negative sentiment indicates growing dissatisfaction.\n\n"
+                    "Recommendations:\n"
+                    "- Conduct detailed feedback sessions and prioritize flexible schedules and mental health resources.")
+    else:
+        summary += ("Very negative sentiment highlights critical issues.\n\n"
+                    "Urgent Recommendations:\n"
+                    "- Immediately address employee concerns with comprehensive changes and increased support.")
+    if negative_pct > 30:
+        summary += "\n\nNote: Over 30% negative responses indicate deep-rooted dissatisfaction that must be addressed promptly."
+    return summary
+
+def scale_numbers(col):
+    is_numeric = pd.api.types.is_numeric_dtype(col)
+    if is_numeric:
+        values = col.to_numpy(dtype=float)
+        col_scaled_values = scale_to_range(values, np.nanmin(values), np.nanmax(values))
+        col_scaled = pd.DataFrame(col_scaled_values, columns=["data_scaled"], index=col.index)
+        return col_scaled
+    return None
+
+def scale_to_range(col, data_min, data_max):
+    """Scale values to [-1, 1] using a known min/max, the same way scale_numbers does.
+
+    Used when the range was measured beforehand (e.g. over a whole file read in chunks).
+    A constant column maps to -1, as sklearn's MinMaxScaler does.
+    """
+    data_range = data_max - data_min
+    if data_range == 0:
+        data_range = 1.0
+    return (col - data_min) * (2.0 / data_range) - 1.0
+
+# ==================== Visualization Functions ====================
+# Figures are built with matplotlib's object-oriented API rather than pyplot, so they can
+# be created on the analysis thread and need no plt.close().
+#
+# Every chart function also takes a figure it returned before (fig=) and redraws that
+# figure instead of building a new one, which is how batch export reuses its templates.
+SUBPLOT_PARAMS = ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+
+def chart_axes(fig, figsize):
+    """Return (figure, axes) to draw a chart on: new ones, or fig emptied and reset to defaults."""
+    if fig is None:
+        fig = Figure(figsize=figsize)
+        return fig, fig.subplots()
+    for text in list(fig.texts):
+        text.remove()
+    ax = fig.axes[0]
+    ax.clear()
+    fig.set_size_inches(figsize)
+    fig.subplots_adjust(**{name: rcParams[f'figure.subplot.{name}'] for name in SUBPLOT_PARAMS})
+    return fig, ax
+
+def count_sentiments(labels):
+    """value_counts of a label column, without the zero counts of unused categories."""
+    counts = labels.value_counts()
+    counts = counts[counts > 0]
+    counts.index = counts.index.astype(str)
+    return counts
+
+def generate_pie_chart(df, fig=None):
+    """Generate a pie chart showing sentiment distribution (for text analysis)."""
+    counts = count_sentiments(df['sentiment'])
+    fig, ax = chart_axes(fig, (4, 4))
+    ax.pie(counts, labels=counts.index, autopct='%1.1f%%', startangle=90)
+    ax.set_title("Sentiment Distribution")
+    fig.text(0.5, 0.01, "Caption: This pie chart shows the percentage distribution of sentiments from the text data.", 
+    ha="center", fontsize=10)
+    return fig
+
+def generate_sentiment_pie_chart(df, fig=None):
+    """Generate a pie chart showing sentiment distribution based on numeric ratings."""
+    sentiment_counts = count_sentiments(df['rating_sentiment'])
+    fig, ax = chart_axes(fig, (4, 4))
+    ax.pie(sentiment_counts, labels=sentiment_counts.index, autopct='%1.1f%%', startangle=90)
+    ax.set_title("Sentiment Distribution")
+    fig.subplots_adjust(bottom=0.25)
+    fig.text(0.5, 0.05,
+    "Caption: This pie chart represents the percentage of numeric ratings grouped into sentiment categories derived from employees' ratings.",
+     ha="center", fontsize=10)
+    return fig
+
+# Above this many points the scatter plots draw a downsampled, rasterized version.
+SCATTER_MAX_POINTS = 100_000
+# (value bins, row bins) used for downsampling; at most two points are drawn per cell.
+SCATTER_GRID = (100, 500)
+
+def downsample_scatter(values, grid=SCATTER_GRID):
+    """Return the positions of the rows to draw when there are too many to plot one by one.
+
+    Rows are put on a grid of value bins by bins of consecutive rows, and in every occupied
+    cell the rows with the smallest and largest value are kept. Each row bin therefore
+    keeps its exact min and max, and the number of points is bounded by the grid size
+    however many rows there are.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    value_bins, row_bins = grid
+    low, high = values.min(), values.max()
+    span = (high - low) or 1.0
+    value_cell = np.minimum(((values - low) / span * value_bins).astype(np.int64), value_bins - 1)
+    cell = (np.arange(n) * row_bins // n) * value_bins + value_cell
+    order = np.lexsort((values, cell))
+    sorted_cells = cell[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+def generate_scatter_plot(df, fig=None):
+    """Generate a scatter plot of polarity values (for text analysis) with axes switched."""
+    fig, ax = chart_axes(fig, (6, 4))
+    if len(df) > SCATTER_MAX_POINTS:
+        rows = downsample_scatter(df['polarity'])
+        ax.scatter(df['polarity'].to_numpy()[rows], rows, color='blue', rasterized=True)
+        ax.set_title(f"Polarity Scatter Plot\n(min/max per bin: {len(rows):,} of {len(df):,} points)")
+    else:
+        ax.scatter(df['polarity'], range(len(df)), color='blue')
+        ax.set_title("Polarity Scatter Plot")
+    ax.set_xlabel("Polarity")
+    ax.set_ylabel("Data Inputs")
+    fig.subplots_adjust(bottom=0.25)
+    fig.text(0.5, 0.05,
+     "Caption: This scatter plot shows each review's sentiment polarity where each point's horizontal position represents its order and vertical position shows its polarity score.",
+      ha="center", fontsize=10)
+    return fig
+
+def generate_sentiment_scatter_plot(df, fig=None):
+    """Generate a scatter plot for numeric ratings
+       x-axis: rating (1-5), y-axis: Inputs, colored by sentiment.
+    """
+    colors = {"Negative": "red", "Neutral": "gray", "Positive": "green"}
+    df_filtered = df[df['numeric'].between(1, 5)]
+    fig, ax = chart_axes(fig, (6, 4))
+    x_values = df_filtered['numeric']
+    y_values = df_filtered.index
+    if len(df_filtered) > SCATTER_MAX_POINTS:
+        rows = downsample_scatter(x_values)
+        ax.scatter(x_values.to_numpy()[rows], y_values[rows],
+                   c=df_filtered['rating_sentiment'].iloc[rows].map(colors), s=20, rasterized=True)
+        ax.set_title(f"Scores Scatter Plot\n(min/max per bin: {len(rows):,} of {len(df_filtered):,} points)")
+    else:
+        ax.scatter(x_values, y_values, c=df_filtered['rating_sentiment'].map(colors), s=20)
+        ax.set_title("Scores Scatter Plot")
+    ax.set_xlabel("Score")
+    ax.set_ylabel("Data Inputs")
+    ax.set_xticks([1, 2, 3, 4, 5])
+    fig.subplots_adjust(bottom=0.25)
+    fig.text(0.5, 0.05,
+    "Caption: This scatter plot displays numeric ratings (on the x-axis) for each data input (ordered on the y-axis), with colors indicating the assigned sentiment.",
+     ha="center", fontsize=10)
+    return fig
+
+# Words drawn in a word cloud; the same default WordCloud uses.
+WORDCLOUD_MAX_WORDS = 200
+
+def generate_wordcloud(words, title, max_words=WORDCLOUD_MAX_WORDS, fig=None):
+    """Generate a word cloud figure from word counts (e.g. from count_sentiment_words) or text.
+
+    Only the max_words most frequent words are passed to WordCloud.generate_from_frequencies,
+    so the cost depends on the vocabulary, not on the size of the corpus.
+    """
+    if isinstance(words, str):
+        words = word_frequencies(words)
+    frequencies = dict(Counter(merge_word_forms(words)).most_common(max_words))
+    if not frequencies:
+        frequencies = word_frequencies("No data available.")
+    wordcloud = WordCloud(width=800, height=400, background_color='white',
+                          max_words=max_words).generate_from_frequencies(frequencies)
+    fig, ax = chart_axes(fig, (8, 4))
+    ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis('off')
+    ax.set_title(title)
+    fig.text(0.5, 0.01,
+    "Caption: The word cloud visualizes the most frequent words from the text, with larger words representing higher frequencies.",
+    ha="center", fontsize=10)
+    return fig
+
+def generate_bar_chart_text(df, fig=None):
+    """Generate a bar chart showing sentiment distribution for text analysis."""
+    counts = count_sentiments(df['sentiment'])
+    color_mapping = {"Positive": "green", "Neutral": "yellow", "Negative": "red"}
+    colors = [color_mapping.get(sentiment, "blue") for sentiment in counts.index]
+    fig, ax = chart_axes(fig, (6, 4))
+    ax.bar(counts.index, counts.values, color=colors)
+    ax.set_title("Text Sentiment Distribution - Bar Chart")
+    ax.set_xlabel("Sentiment")
+    ax.set_ylabel("Data Inputs")
+    fig.subplots_adjust(bottom=0.25)
+    fig.text(0.5, 0.05,
+    "Caption: This bar chart shows the number of text reviews in each sentiment category (Positive, Neutral, Negative), with different colors representing each category.",
+    ha="center", fontsize=10)
+    return fig
+
+def generate_bar_chart_numeric(df, fig=None):
+    """Generate a bar chart showing sentiment distribution based on numeric ratings."""
+    counts = count_sentiments(df['rating_sentiment'])
+    color_mapping = {"Positive": "green", "Neutral": "yellow", "Negative": "red"}
+    colors = [color_mapping.get(sentiment, "blue") for sentiment in counts.index]
+    fig, ax = chart_axes(fig, (6, 4))
+    ax.bar(counts.index, counts.values, color=colors)
+    ax.set_title("Numeric Sentiment Distribution - Bar Chart")
+    ax.set_xlabel("Rating Sentiment")
+    ax.set_ylabel("Data inputs")
+    fig.subplots_adjust(bottom=0.25)
+    fig.text(0.5, 0.05,
+    "Caption: This bar chart illustrates how many numeric ratings fall into each sentiment category, with colors used to differentiate between Positive, Neutral, and Negative ratings.",
+    ha="center", fontsize=10)
+    return fig
+
+# ==================== Analysis Pipeline ====================
+# Rows scored between progress updates and cancellation checks in run_analysis.
+ANALYSIS_CHUNK_ROWS = 10_000
+
+class AnalysisCancelled(Exception):
+    """Raised by the check_cancelled of run_hooks (e.g. in run_analysis) once its cancel_event is set."""
+
+def run_hooks(progress=None, cancel_event=None):
+    """Return (report, check_cancelled) for the optional progress callback and cancel event.
+
+    report(rows) passes rows on to progress; check_cancelled() raises AnalysisCancelled
+    once cancel_event is set.
+    """
+    def report(rows):
+        if progress is not None:
+            progress(rows)
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise AnalysisCancelled()
+
+    return report, check_cancelled
+
+def score_in_chunks(series, cache=None, report=None, check_cancelled=None, profiler=DISABLED, word_counts=None,
+                    parallel=True):
+    """Score a text column ANALYSIS_CHUNK_ROWS rows at a time; returns (labels, polarities).
+
+    Large columns are scored in a process pool unless parallel is False. Between chunks, check_cancelled() may raise
+    to stop and report(rows) is told how many rows are done. If word_counts is given, the
+    words of each chunk are counted into it with count_sentiment_words.
+    """
+    pool = create_scoring_pool() if parallel and len(series) >= PARALLEL_MIN_ROWS else None
+    labels, polarities = [], []
+
+    def finish(start, chunk, chunk_labels, chunk_polarities):
+        if word_counts is not None:
+            with profiler.stage("count_words", rows=len(chunk)):
+                count_sentiment_words(chunk, chunk_labels, word_counts)
+        labels.append(chunk_labels)
+        polarities.append(chunk_polarities)
+        if report is not None:
+            report(start + len(chunk))
+
+    def wait_and_finish(start, chunk, scored):
+        with profiler.stage("score_text", rows=len(chunk)):
+            chunk_labels, chunk_polarities = scored()
+        finish(start, chunk, chunk_labels, chunk_polarities)
+
+    # With a pool, each chunk is submitted before the words of the one before it are
+    # counted, so the pool scores while this process counts.
+    previous = None
+    try:
+        for start in range(0, len(series), ANALYSIS_CHUNK_ROWS):
+            if check_cancelled is not None:
+                check_cancelled()
+            chunk = series.iloc[start:start + ANALYSIS_CHUNK_ROWS]
+            if pool is None:
+                with profiler.stage("score_text", rows=len(chunk)):
+                    chunk_labels, chunk_polarities = analyze_sentiment_batch(chunk, cache)
+                finish(start, chunk, chunk_labels, chunk_polarities)
+                continue
+            with profiler.stage("score_text", rows=len(chunk)):
+                scored = submit_sentiment_parallel(chunk, pool, cache=cache)
+            if previous is not None:
+                wait_and_finish(*previous)
+            previous = (start, chunk, scored)
+        if previous is not None:
+            wait_and_finish(*previous)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    labels = np.concatenate(labels) if labels else np.empty(0, dtype=str)
+    polarities = np.concatenate(polarities) if polarities else np.empty(0)
+    return labels, polarities
+
+def run_analysis(data, selected_col, cache=None, progress=None, cancel_event=None, profiler=DISABLED,
+                 parallel=True):
+    """Analyze one column of a DataFrame and prepare its charts and summary.
+
+    Touches no Tk state, so the app runs it on a background thread. progress(rows) is
+    called as rows are scored, and cancel_event is checked between chunks, which bounds
+    how long a cancelled run keeps going.
+
+    Returns a dict with a compact result frame (categorical labels, float32 scores)
+    separate from the data, the charts as (tab title, build function) pairs, the word
+    cloud message, the summary text and, for numeric columns, the analyze_numeric_ratings
+    statistics. Figures are only built when a build function is called, so the app can
+    render each tab the first time it is shown; build(fig) redraws a figure it returned
+    before instead of building a new one.
+
+    Each stage (the numeric path, or scoring and word counting per chunk) is recorded
+    in profiler.
+
+    With parallel=False, large text columns are scored in this process, e.g. when runs
+    are already spread over a process pool.
+    """
+    report, check_cancelled = run_hooks(progress, cancel_event)
+    with profiler.stage("numeric_path", rows=len(data)):
+        numeric = analyze_numeric_column(data[selected_col])
+    results = pd.DataFrame(index=data.index)
+    stats = None
+
+    if numeric is not None:
+        results['numeric'] = numeric['numeric']
+        #scales data between -1,1
+        results['scaled'] = numeric['scaled'].astype(np.float32)
+        results['rating_sentiment'] = pd.Categorical(numeric['labels'], categories=SENTIMENT_LABELS)
+        stats = numeric['stats']
+        report(len(data))
+        check_cancelled()
+
+        charts = [
+            ("Pie Chart", lambda fig=None: generate_sentiment_pie_chart(results, fig)),
+            ("Scatter Plot", lambda fig=None: generate_sentiment_scatter_plot(results, fig)),
+            ("Bar Chart", lambda fig=None: generate_bar_chart_numeric(results, fig)),
+        ]
+        word_cloud_message = "Data analyzed was numerical, so no word cloud was generated."
+
+        sentiment_counts = dict(zip(*np.unique(numeric['labels'], return_counts=True)))
+        total = len(numeric['labels'])
+        positive_pct = (sentiment_counts.get("Positive", 0) / total) * 100
+        neutral_pct = (sentiment_counts.get("Neutral", 0) / total) * 100
+        negative_pct = (sentiment_counts.get("Negative", 0) / total) * 100
+        avg_rating = stats['average']
+        summary = generate_predefined_summary_numeric(positive_pct, neutral_pct, negative_pct, avg_rating)
+    else:
+        word_counts = {'Positive': Counter(), 'Negative': Counter()}
+        labels, polarities = score_in_chunks(data[selected_col], cache, report, check_cancelled,
+                                             profiler, word_counts, parallel)
+        sentiment_counts = pd.Series(labels).value_counts().to_dict()
+        avg_polarity = polarities.mean()
+        results['sentiment'] = pd.Categorical(labels, categories=SENTIMENT_LABELS)
+        results['polarity'] = polarities.astype(np.float32)
+        check_cancelled()
+
+        charts = [
+            ("Pie Chart", lambda fig=None: generate_pie_chart(results, fig)),
+            ("Scatter Plot", lambda fig=None: generate_scatter_plot(results, fig)),
+            ("Bar Chart", lambda fig=None: generate_bar_chart_text(results, fig)),
+            ("Positive Word Cloud",
+             lambda fig=None: generate_wordcloud(word_counts['Positive'], "Positive Word Cloud", fig=fig)),
+            ("Negative Word Cloud",
+             lambda fig=None: generate_wordcloud(word_counts['Negative'], "Negative Word Cloud", fig=fig)),
+        ]
+        word_cloud_message = None
+        summary = generate_predefined_summary_text(sentiment_counts, avg_polarity)
+
+    return {
+        'results': results,
+        'charts': charts,
+        'word_cloud_message': word_cloud_message,
+        'summary': summary,
+        'stats': stats,
+    }
+
+# ==================== Grouped Analysis ====================
+# Group label used when analyze_columns is not given a group_by column.
+ALL_ROWS_GROUP = "All"
+
+def group_codes(data, group_by=None):
+    """Return (code of each row's group, group labels) for a group_by column.
+
+    Groups are sorted when their values allow it, and missing values form a group of their
+    own. Without group_by, every row belongs to the single ALL_ROWS_GROUP group.
+    """
+    if group_by is None:
+        return np.zeros(len(data), dtype=np.int64), pd.Index([ALL_ROWS_GROUP])
+    try:
+        codes, groups = pd.factorize(data[group_by], sort=True, use_na_sentinel=False)
+    except TypeError:
+        # Mixed value types that cannot be ordered; keep the order of first appearance.
+        codes, groups = pd.factorize(data[group_by], use_na_sentinel=False)
+    return codes.astype(np.int64), pd.Index(groups)
+
+def _sentiment_table(codes, n_groups, labels, values, valid):
+    """Per-group label counts, row counts and mean of the valid values, without a loop over groups."""
+    label_codes = pd.Categorical(labels, categories=SENTIMENT_LABELS).codes.astype(np.int64)
+    counts = np.bincount(codes * len(SENTIMENT_LABELS) + label_codes,
+                         minlength=n_groups * len(SENTIMENT_LABELS)).reshape(n_groups, len(SENTIMENT_LABELS))
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+    valid_counts = np.bincount(codes[valid], minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = sums / valid_counts
+    return counts, counts.sum(axis=1), average
+
+def _value_counts_dict(row):
+    """The labels of one row of counts as value_counts().to_dict() would give them: most frequent first, no zeros."""
+    order = np.argsort(-row, kind='stable')
+    return {SENTIMENT_LABELS[i]: int(row[i]) for i in order if row[i] > 0}
+
+def analyze_columns(data, columns, group_by=None, cache=None, progress=None, cancel_event=None, profiler=DISABLED):
+    """Analyze several columns at once, per group of the group_by column if one is given.
+
+    Each column is classified as numeric or text with the same rules as run_analysis, and
+    rows get the same labels they would get there (numeric ratings are scaled over the
+    whole column). All text columns are scored together in one chunked pass, so a text
+    shared by several columns or groups is scored once. Counts and means per group come
+    from np.bincount over the group codes, which scales to thousands of groups. Only the
+    summary texts are formatted group by group.
+
+    progress(rows) counts each row once per column. Returns a DataFrame with one row per
+    column and group: column, group, mode, rows, a count per sentiment label, average
+    (mean polarity or rating) and the summary text.
+    """
+    report, check_cancelled = run_hooks(progress, cancel_event)
+    codes, groups = group_codes(data, group_by)
+    n_groups = len(groups)
+    tables = []
+    text_columns = []
+    done = 0
+    for column in columns:
+        check_cancelled()
+        with profiler.stage("numeric_path", rows=len(data)):
+            numeric = analyze_numeric_column(data[column])
+        if numeric is None:
+            text_columns.append(column)
+            continue
+        values = numeric['numeric'].to_numpy(dtype=float)
+        with profiler.stage("group_counts", rows=len(data)):
+            counts, rows, average = _sentiment_table(codes, n_groups, numeric['labels'], values, ~np.isnan(values))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            percents = counts / rows[:, None] * 100
+        with profiler.stage("group_summaries", rows=n_groups):
+            summaries = [generate_predefined_summary_numeric(positive, neutral, negative, avg)
+                         for (negative, neutral, positive), avg in zip(percents, average)]
+        tables.append((column, 'numeric', counts, rows, average, summaries))
+        done += len(data)
+        report(done)
+
+    if text_columns:
+        texts = pd.concat([data[column] for column in text_columns], ignore_index=True)
+        labels, polarities = score_in_chunks(texts, cache, lambda rows: report(done + rows),
+                                             check_cancelled, profiler)
+        check_cancelled()
+        everything = np.ones(len(data), dtype=bool)
+        for i, column in enumerate(text_columns):
+            rows_of_column = slice(i * len(data), (i + 1) * len(data))
+            with profiler.stage("group_counts", rows=len(data)):
+                counts, rows, average = _sentiment_table(codes, n_groups, labels[rows_of_column],
+                                                         polarities[rows_of_column], everything)
+            with profiler.stage("group_summaries", rows=n_groups):
+                summaries = [generate_predefined_summary_text(_value_counts_dict(row), avg)
+                             for row, avg in zip(counts, average)]
+            tables.append((column, 'text', counts, rows, average, summaries))
+
+    order = {column: i for i, column in enumerate(columns)}
+    tables.sort(key=lambda table: order[table[0]])
+    frames = []
+    for column, mode, counts, rows, average, summaries in tables:
+        frame = pd.DataFrame({'column': column, 'group': groups, 'mode': mode, 'rows': rows})
+        for i, label in enumerate(SENTIMENT_LABELS):
+            frame[label] = counts[:, i]
+        frame['average'] = average
+        frame['summary'] = summaries
+        # Groups with no rows (only possible for categorical group columns) are left out.
+        frames.append(frame[frame['rows'] > 0])
+    if not frames:
+        return pd.DataFrame(columns=['column', 'group', 'mode', 'rows', *SENTIMENT_LABELS, 'average', 'summary'])
+    return pd.concat(frames, ignore_index=True)
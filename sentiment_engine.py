@@ -0,0 +1,501 @@
+"""Headless analysis engine for large survey exports.
+
+Streams a single column of a CSV, Parquet or Feather file in bounded-size chunks,
+so peak memory depends on the chunk size rather than on the size of the file. The results
+(sentiment counts, mean polarity or rating, and the summary text) are the same
+as the ones SentimentApp.perform_analysis produces for the whole file.
+
+Usage:
+    python sentiment_engine.py survey.csv --column text_reviews --chunksize 50000
+    python sentiment_engine.py survey.csv --column text_reviews --checkpoint survey.ckpt.json
+    python sentiment_engine.py survey.csv --column text_reviews --trace run.trace.json
+"""
+import argparse
+import copy
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import sys
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from data_sources import DEFAULT_CHUNKSIZE, file_format, iter_column_chunks, read_columns
+from instrumentation import DISABLED, Profiler
+from polarity_cache import PolarityCache
+from sentiment_core import (
+    ANALYZER_VERSION,
+    analyze_sentiment_batch,
+    analyze_sentiment_parallel,
+    create_scoring_pool,
+    generate_predefined_summary_numeric,
+    generate_predefined_summary_text,
+    label_ratings,
+    rating_stats,
+    scale_to_range,
+)
+
+# ==================== Chunk Aggregation ====================
+def _count_labels(counts, labels):
+    """Add the occurrences of each sentiment label to a Counter."""
+    for label, n in zip(*np.unique(np.asarray(labels, dtype=str), return_counts=True)):
+        counts[str(label)] += int(n)
+
+def _update_range(stats, values):
+    """Fold the count, sum, min and max of the non-null values into stats."""
+    valid = values.dropna()
+    if valid.empty:
+        return
+    stats['count'] += len(valid)
+    stats['sum'] += float(valid.sum())
+    low, high = float(valid.min()), float(valid.max())
+    stats['min'] = low if stats['min'] is None else min(stats['min'], low)
+    stats['max'] = high if stats['max'] is None else max(stats['max'], high)
+
+def _parse_numeric(col, is_percent):
+    """Parse a chunk the way perform_analysis does, as percentages or plain numbers."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(float) / 100.0 if is_percent else col.astype(float)
+    if is_percent:
+        return pd.to_numeric(col.astype(str).str.rstrip('%'), errors='coerce') / 100.0
+    return pd.to_numeric(col, errors='coerce')
+
+def _count_percent(col):
+    """Number of values in a chunk that contain '%'; none can in a numeric chunk."""
+    if pd.api.types.is_numeric_dtype(col):
+        return 0
+    return int(col.astype(str).str.contains('%', regex=False).sum())
+
+def _count_values(values_counter, values):
+    """Add the occurrences of each distinct parsed value (NaN as None) to a Counter."""
+    values = np.asarray(values, dtype=float)
+    missing = int(np.isnan(values).sum())
+    if missing:
+        values_counter[None] += missing
+    for value, n in zip(*np.unique(values[~np.isnan(values)], return_counts=True)):
+        values_counter[float(value)] += int(n)
+
+def _stats_from_value_counts(values_counter):
+    """Return rating_stats for a Counter of parsed values, in a JSON-friendly form."""
+    distinct = sorted(value for value in values_counter if value is not None)
+    stats = rating_stats(distinct, [values_counter[value] for value in distinct])
+    stats['distribution'] = {value: int(n) for value, n in stats['distribution'].items()}
+    return stats
+
+def scan_column_format(path, column, chunksize=DEFAULT_CHUNKSIZE, profiler=DISABLED):
+    """First pass over the column: decide between numeric and text analysis.
+
+    Applies the same rules as perform_analysis (more than 80% percent values means
+    percentages, more than 80% parseable values means numeric) and keeps the range
+    of both numeric readings so the second pass can scale without holding the data.
+    """
+    rows = 0
+    percent_rows = 0
+    plain = {'count': 0, 'sum': 0.0, 'min': None, 'max': None}
+    percent = {'count': 0, 'sum': 0.0, 'min': None, 'max': None}
+    for col in profiler.iter_stage("read_chunk", iter_column_chunks(path, column, chunksize)):
+        with profiler.stage("detect_format", rows=len(col)):
+            rows += len(col)
+            percent_rows += _count_percent(col)
+            _update_range(plain, _parse_numeric(col, False))
+            _update_range(percent, _parse_numeric(col, True))
+    if rows == 0:
+        raise ValueError(f"Column '{column}' has no rows.")
+
+    is_percent = percent_rows / rows > 0.8
+    stats = percent if is_percent else plain
+    return {
+        'rows': rows,
+        'is_percent': is_percent,
+        'is_numeric': stats['count'] / rows > 0.8,
+        'numeric': stats,
+    }
+
+# ==================== Streaming Analysis ====================
+def _stream_numeric(path, column, fmt, chunksize, profiler=DISABLED):
+    """Second pass for numeric columns: label each chunk with the range from the first pass."""
+    stats = fmt['numeric']
+    counts = Counter()
+    values = Counter()
+    for col in profiler.iter_stage("read_chunk", iter_column_chunks(path, column, chunksize)):
+        with profiler.stage("label_ratings", rows=len(col)):
+            numeric = _parse_numeric(col, fmt['is_percent']).to_numpy(dtype=float)
+            _count_labels(counts, label_ratings(scale_to_range(numeric, stats['min'], stats['max'])))
+            _count_values(values, numeric)
+    result = _numeric_result(counts, stats['sum'] / stats['count'])
+    result['stats'] = _stats_from_value_counts(values)
+    return result
+
+def _numeric_result(counts, avg_rating):
+    total = sum(counts.values())
+    positive_pct = (counts.get("Positive", 0) / total) * 100
+    neutral_pct = (counts.get("Neutral", 0) / total) * 100
+    negative_pct = (counts.get("Negative", 0) / total) * 100
+    return {
+        'mode': 'numeric',
+        'sentiment_counts': dict(counts.most_common()),
+        'average': avg_rating,
+        'summary': generate_predefined_summary_numeric(positive_pct, neutral_pct, negative_pct, avg_rating),
+    }
+
+@contextmanager
+def _text_scorer(workers, cache):
+    """Yield a function that scores a chunk of text, in a process pool unless workers is 1."""
+    if workers == 1:
+        yield lambda col: analyze_sentiment_batch(col, cache)
+        return
+    with create_scoring_pool(workers) as pool:
+        yield lambda col: analyze_sentiment_parallel(col, workers, pool, cache)
+
+def _stream_text(path, column, chunksize, workers, cache, profiler=DISABLED):
+    counts = Counter()
+    rows = 0
+    polarity_sum = 0.0
+    with _text_scorer(workers, cache) as score:
+        for col in profiler.iter_stage("read_chunk", iter_column_chunks(path, column, chunksize)):
+            with profiler.stage("score_text", rows=len(col)):
+                labels, polarities = score(col)
+            _count_labels(counts, labels)
+            polarity_sum += float(polarities.sum())
+            rows += len(col)
+    return _text_result(counts, polarity_sum / rows)
+
+def _text_result(counts, avg_polarity):
+    sentiment_counts = dict(counts.most_common())
+    return {
+        'mode': 'text',
+        'sentiment_counts': sentiment_counts,
+        'average': avg_polarity,
+        'summary': generate_predefined_summary_text(sentiment_counts, avg_polarity),
+    }
+
+def stream_analysis(path, column=None, chunksize=DEFAULT_CHUNKSIZE, workers=1, cache=None, profiler=DISABLED):
+    """Analyze one column of a CSV, Parquet or Feather file without loading the file into memory.
+
+    Defaults to the first column, like the column selector in the app. Text is scored
+    in-process when workers is 1, otherwise in a pool of that many processes (None
+    means one per core), and looked up in the PolarityCache first if one is given.
+    Returns a dict
+    with the column, row count, mode ('text' or 'numeric'), sentiment counts, average
+    polarity or rating, and the summary text. Reading, detection and scoring of every
+    chunk are recorded in profiler.
+    """
+    with profiler.stage("read_columns"):
+        columns = read_columns(path)
+    if column is None:
+        if not columns:
+            raise ValueError(f"{path} has no columns.")
+        column = columns[0]
+    elif column not in columns:
+        raise ValueError(f"Column '{column}' not found in {path}.")
+
+    with profiler.stage("scan_column_format") as stage:
+        fmt = scan_column_format(path, column, chunksize, profiler)
+        stage.rows = fmt['rows']
+    with profiler.stage("analyze_column", rows=fmt['rows']):
+        if fmt['is_numeric']:
+            result = _stream_numeric(path, column, fmt, chunksize, profiler)
+        else:
+            result = _stream_text(path, column, chunksize, workers, cache, profiler)
+    result['column'] = column
+    result['rows'] = fmt['rows']
+    return result
+
+# ==================== Incremental Analysis ====================
+# A checkpoint is a JSON file holding everything needed to fold newly appended rows into
+# the results: the byte offset already read, a fingerprint of the bytes before it, the
+# running counts and sums, and for numeric columns the count of each distinct value. Labels of numeric rows depend on the min/max of
+# the whole column, so they are derived from the value counts when the summary is built;
+# a new value that widens the range re-labels earlier rows without re-reading them.
+CHECKPOINT_VERSION = 2
+# Bytes before the offset that the fingerprint covers, besides the header line.
+FINGERPRINT_BYTES = 4096
+
+class _BoundedReader(io.RawIOBase):
+    """Read a file from `start` up to `end`, so rows appended during a run wait for the next one."""
+
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._file.read(min(len(buffer), self._left))
+        buffer[:len(data)] = data
+        self._left -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def _last_newline_end(f, end):
+    """Return the byte offset just past the last newline before `end`, or 0 if there is none."""
+    while end > 0:
+        start = max(0, end - 65536)
+        f.seek(start)
+        block = f.read(end - start)
+        newline = block.rfind(b'\n')
+        if newline != -1:
+            return start + newline + 1
+        end = start
+    return 0
+
+def _fingerprint(path, offset):
+    """Hash the header line and the last FINGERPRINT_BYTES bytes before `offset`."""
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.readline())
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        digest.update(f.read(offset - start))
+    return digest.hexdigest()
+
+def _check_same_file(checkpoint, size):
+    """Raise a ValueError if the file no longer starts with the rows the checkpoint has read."""
+    path, offset = checkpoint['path'], checkpoint['offset']
+    if size < offset:
+        raise ValueError(f"{path} is shorter than when it was last analyzed; start a new checkpoint.")
+    if offset and _fingerprint(path, offset) != checkpoint['fingerprint']:
+        raise ValueError(f"{path} has changed since it was last analyzed; start a new checkpoint.")
+
+def new_checkpoint(path, column=None):
+    """Return an empty checkpoint for one column of a CSV file (default: the first column)."""
+    if file_format(path) != 'csv':
+        raise ValueError("Incremental analysis needs a CSV file that new rows are appended to.")
+    columns = read_columns(path)
+    if column is None:
+        if not columns:
+            raise ValueError(f"{path} has no columns.")
+        column = columns[0]
+    elif column not in columns:
+        raise ValueError(f"Column '{column}' not found in {path}.")
+    return {
+        'version': CHECKPOINT_VERSION,
+        'path': os.path.abspath(path),
+        'columns': columns,
+        'column': column,
+        'offset': 0,
+        'fingerprint': None,
+        'rows': 0,
+        'percent_rows': 0,
+        'plain_count': 0,
+        'percent_count': 0,
+        'mode': None,
+        'is_percent': None,
+        # Text columns.
+        'sentiment_counts': {},
+        'polarity_sum': 0.0,
+        # Numeric columns: [value, count] pairs (NaN as None), and the sum of valid values.
+        'value_counts': [],
+        'numeric_sum': 0.0,
+    }
+
+def load_checkpoint(checkpoint_path):
+    with open(checkpoint_path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{checkpoint_path} was written by an incompatible version; delete it and re-run.")
+    return checkpoint
+
+def save_checkpoint(checkpoint, checkpoint_path):
+    """Write the checkpoint atomically, so an interrupted run never leaves it half-written."""
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def _iter_new_chunks(checkpoint, end, chunksize):
+    """Yield the checkpoint's column for the rows between its offset and `end`."""
+    if checkpoint['offset'] == 0:
+        options = {'header': 0}
+    else:
+        options = {'header': None, 'names': checkpoint['columns']}
+    with io.BufferedReader(_BoundedReader(checkpoint['path'], checkpoint['offset'], end)) as f:
+        for chunk in pd.read_csv(f, usecols=[checkpoint['column']], chunksize=chunksize, **options):
+            yield chunk[checkpoint['column']]
+
+def _detected_mode(checkpoint):
+    """Apply the perform_analysis detection rules to the rows seen so far."""
+    rows = checkpoint['rows']
+    is_percent = checkpoint['percent_rows'] / rows > 0.8
+    valid = checkpoint['percent_count'] if is_percent else checkpoint['plain_count']
+    return ('numeric' if valid / rows > 0.8 else 'text'), is_percent
+
+def _update_detection(checkpoint, col):
+    checkpoint['rows'] += len(col)
+    checkpoint['percent_rows'] += _count_percent(col)
+    checkpoint['plain_count'] += int(_parse_numeric(col, False).notna().sum())
+    checkpoint['percent_count'] += int(_parse_numeric(col, True).notna().sum())
+
+def update_checkpoint(checkpoint, chunksize=DEFAULT_CHUNKSIZE, workers=1, cache=None, profiler=DISABLED):
+    """Fold the rows appended since the last update into the checkpoint.
+
+    Only the new rows are read and scored, up to the last newline: a last row without one
+    may still be being written. The column is classified as text or numeric from the rows
+    of the first update and keeps that mode; if later rows change what the detection rules
+    would decide, a ValueError asks for a full re-analysis. Returns the number of new rows.
+    """
+    size = os.path.getsize(checkpoint['path'])
+    _check_same_file(checkpoint, size)
+    with open(checkpoint['path'], 'rb') as f:
+        end = _last_newline_end(f, size)
+    return _fold_rows(checkpoint, end, chunksize, workers, cache, profiler)
+
+def _fold_rows(checkpoint, end, chunksize, workers, cache, profiler):
+    """Fold the rows between the checkpoint's offset and `end` into it; returns how many there were."""
+    if end <= checkpoint['offset']:
+        return 0
+
+    rows_before = checkpoint['rows']
+    if checkpoint['mode'] is None:
+        for col in profiler.iter_stage("read_chunk", _iter_new_chunks(checkpoint, end, chunksize)):
+            with profiler.stage("detect_format", rows=len(col)):
+                _update_detection(checkpoint, col)
+        if checkpoint['rows'] == 0:
+            return 0
+        checkpoint['mode'], checkpoint['is_percent'] = _detected_mode(checkpoint)
+        detected = True
+    else:
+        detected = False
+
+    counts = Counter(checkpoint['sentiment_counts'])
+    values = Counter({value: n for value, n in checkpoint['value_counts']})
+    with _text_scorer(workers, cache) as score:
+        for col in profiler.iter_stage("read_chunk", _iter_new_chunks(checkpoint, end, chunksize)):
+            if not detected:
+                _update_detection(checkpoint, col)
+            if checkpoint['mode'] == 'text':
+                with profiler.stage("score_text", rows=len(col)):
+                    labels, polarities = score(col)
+                _count_labels(counts, labels)
+                checkpoint['polarity_sum'] += float(polarities.sum())
+            else:
+                with profiler.stage("count_values", rows=len(col)):
+                    numeric = _parse_numeric(col, checkpoint['is_percent'])
+                    checkpoint['numeric_sum'] += float(numeric.sum())
+                    _count_values(values, numeric)
+
+    if _detected_mode(checkpoint) != (checkpoint['mode'], checkpoint['is_percent']):
+        raise ValueError(f"Column '{checkpoint['column']}' no longer looks like {checkpoint['mode']} data; "
+                         "delete the checkpoint and re-run the full analysis.")
+    checkpoint['sentiment_counts'] = dict(counts)
+    checkpoint['value_counts'] = [[value, n] for value, n in values.items()]
+    checkpoint['offset'] = end
+    checkpoint['fingerprint'] = _fingerprint(checkpoint['path'], end)
+    return checkpoint['rows'] - rows_before
+
+def summarize_checkpoint(checkpoint):
+    """Build the same result dict as stream_analysis from a checkpoint."""
+    if checkpoint['rows'] == 0:
+        raise ValueError(f"Column '{checkpoint['column']}' has no rows.")
+    if checkpoint['mode'] == 'text':
+        result = _text_result(Counter(checkpoint['sentiment_counts']),
+                              checkpoint['polarity_sum'] / checkpoint['rows'])
+    else:
+        values = Counter({value: n for value, n in checkpoint['value_counts']})
+        stats = _stats_from_value_counts(values)
+        # Missing values (None) scale to NaN, which label_ratings labels Positive like the app.
+        distinct = np.array([np.nan if value is None else value for value in values], dtype=float)
+        labels = label_ratings(scale_to_range(distinct, stats['min'], stats['max']))
+        counts = Counter()
+        for label, n in zip(labels, values.values()):
+            counts[str(label)] += n
+        result = _numeric_result(counts, checkpoint['numeric_sum'] / (values.total() - values[None]))
+        result['stats'] = stats
+    result['column'] = checkpoint['column']
+    result['rows'] = checkpoint['rows']
+    return result
+
+def incremental_analysis(path, checkpoint_path, column=None, chunksize=DEFAULT_CHUNKSIZE, workers=1, cache=None,
+                         profiler=DISABLED):
+    """Analyze only the rows appended to a CSV file since the last run.
+
+    Creates the checkpoint on the first run. Returns the stream_analysis result dict with
+    an extra 'new_rows' entry: the complete rows added to the checkpoint by this run.
+    """
+    if os.path.exists(checkpoint_path):
+        checkpoint = load_checkpoint(checkpoint_path)
+        if checkpoint['path'] != os.path.abspath(path) or (column and column != checkpoint['column']):
+            raise ValueError(f"{checkpoint_path} belongs to column '{checkpoint['column']}' "
+                             f"of {checkpoint['path']}.")
+    else:
+        checkpoint = new_checkpoint(path, column)
+    with profiler.stage("update_checkpoint") as stage:
+        new_rows = update_checkpoint(checkpoint, chunksize, workers, cache, profiler)
+        stage.rows = new_rows
+    save_checkpoint(checkpoint, checkpoint_path)
+    # An unterminated last row counts in this run's result but is left out of the saved
+    # checkpoint, so the next run reads it again once the rest of it has been written.
+    current = checkpoint
+    size = os.path.getsize(path)
+    if size > checkpoint['offset']:
+        current = copy.deepcopy(checkpoint)
+        with profiler.stage("read_unterminated_row"):
+            _fold_rows(current, size, chunksize, workers, cache, profiler)
+    with profiler.stage("summarize_checkpoint"):
+        result = summarize_checkpoint(current)
+    result['new_rows'] = new_rows
+    return result
+
+# ==================== Command Line ====================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Analyze a survey column without the GUI.")
+    parser.add_argument("path", help="CSV, Parquet or Feather file to analyze")
+    parser.add_argument("--column", help="column to analyze (default: first column)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"rows read per chunk (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used to score text; 0 means one per core (default: 1)")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="SQLite file used to cache polarities between runs")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="JSON checkpoint; only rows appended since the last run are analyzed")
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="write per-stage wall/CPU time, rows/s and peak allocations as JSON")
+    parser.add_argument("--trace", metavar="PATH", help="write the stages as a Chrome trace (chrome://tracing)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record peak allocations of each stage (slows the run down)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cache = None
+    profiler = Profiler(trace_memory=args.trace_memory) if args.profile or args.trace else DISABLED
+    try:
+        if args.cache:
+            cache = PolarityCache(args.cache, ANALYZER_VERSION)
+        if args.checkpoint:
+            result = incremental_analysis(args.path, args.checkpoint, args.column, args.chunksize,
+                                          args.workers or None, cache, profiler)
+        else:
+            result = stream_analysis(args.path, args.column, args.chunksize, args.workers or None, cache,
+                                     profiler)
+        if cache is not None:
+            result['cache'] = cache.stats()
+        if args.profile:
+            profiler.export_json(args.profile)
+        if args.trace:
+            profiler.export_chrome_trace(args.trace)
+    except (OSError, ImportError, ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        profiler.close()
+        if cache is not None:
+            cache.close()
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(result['summary'])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
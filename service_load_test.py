@@ -0,0 +1,200 @@
+"""Load test of scoring_service.py: requests/sec and latency at several concurrency levels.
+
+Each level runs that many clients at once for --duration seconds. Every client keeps one
+connection open and sends /score requests back to back, each with --texts-per-request
+texts from a synthetic survey. The service's own /metrics are fetched before and after
+each level to show how large its micro-batches were during that level.
+
+Without --url or --unix, a service is started on a free local port for the test.
+
+    python service_load_test.py
+    python service_load_test.py --concurrency 1,16,128 --duration 10
+    python service_load_test.py --url http://127.0.0.1:8765
+    python service_load_test.py --unix /tmp/sentiment.sock --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from benchmark import make_survey
+
+DEFAULT_CONCURRENCY = "1,8,32,128"
+DEFAULT_DURATION = 5.0
+DEFAULT_TEXTS_PER_REQUEST = 1
+# Distinct texts the requests are drawn from.
+TEXT_POOL_SIZE = 5_000
+
+# ==================== Client ====================
+class Connection:
+    """One keep-alive HTTP/1.1 connection to the service."""
+
+    def __init__(self, reader, writer, host):
+        self.reader = reader
+        self.writer = writer
+        self.host = host
+
+    @classmethod
+    async def open(cls, target):
+        if target['unix']:
+            reader, writer = await asyncio.open_unix_connection(target['unix'])
+        else:
+            reader, writer = await asyncio.open_connection(target['host'], target['port'])
+        return cls(reader, writer, target['host'] or "localhost")
+
+    async def request(self, method, path, payload=None):
+        """Send a request and return (status, decoded JSON body)."""
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+        lines = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = dict((name.strip().lower(), value.strip())
+                       for name, value in (line.split(":", 1) for line in lines[1:] if line))
+        data = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        return status, json.loads(data) if data else None
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def _client(target, texts, texts_per_request, deadline, offset, results):
+    connection = await Connection.open(target)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            batch = [texts[(i + k) % len(texts)] for k in range(texts_per_request)]
+            i += texts_per_request
+            start = time.perf_counter()
+            status, _ = await connection.request("POST", "/score", {'texts': batch})
+            elapsed = time.perf_counter() - start
+            if status == 200:
+                results['latencies'].append(elapsed)
+            elif status == 503:
+                results['rejected'] += 1
+            else:
+                results['errors'] += 1
+    finally:
+        await connection.close()
+
+async def fetch_metrics(target):
+    connection = await Connection.open(target)
+    try:
+        _, metrics = await connection.request("GET", "/metrics")
+    finally:
+        await connection.close()
+    return metrics
+
+async def run_level(target, concurrency, duration, texts, texts_per_request):
+    """Run one concurrency level; returns its throughput and latency figures."""
+    results = {'latencies': [], 'rejected': 0, 'errors': 0}
+    before = await fetch_metrics(target)
+    start = time.perf_counter()
+    deadline = start + duration
+    step = max(1, len(texts) // concurrency)
+    await asyncio.gather(*(_client(target, texts, texts_per_request, deadline, n * step, results)
+                           for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(results['latencies'])
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000 if latencies else None
+
+    after = await fetch_metrics(target)
+    batches = after['batches'] - before['batches']
+    batched_texts = after['batched_texts'] - before['batched_texts']
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'rejected': results['rejected'],
+        'errors': results['errors'],
+        'requests_per_second': len(latencies) / elapsed,
+        'texts_per_second': len(latencies) * texts_per_request / elapsed,
+        'latency_ms': {'p50': percentile(50), 'p95': percentile(95), 'p99': percentile(99)},
+        'service_mean_batch_size': batched_texts / batches if batches else 0.0,
+    }
+
+# ==================== Local Service ====================
+def start_service(extra_args=()):
+    """Start scoring_service.py on a free port; returns (process, address it printed)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen([sys.executable, os.path.join(here, "scoring_service.py"), "--port", "0", *extra_args],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Serving on "):
+        process.kill()
+        raise RuntimeError("The scoring service did not start.")
+    return process, line[len("Serving on "):].strip()
+
+def parse_target(address):
+    """Turn 'http://host:port' or 'unix:/path' into connection details."""
+    if address.startswith("unix:"):
+        return {'unix': address[len("unix:"):], 'host': None, 'port': None}
+    parts = urlsplit(address)
+    return {'unix': None, 'host': parts.hostname, 'port': parts.port or 80}
+
+# ==================== Command Line ====================
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load test a local scoring service.")
+    parser.add_argument("--url", help="address of a running service, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--unix", metavar="PATH", help="Unix socket of a running service")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help=f"comma-separated numbers of concurrent clients (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help=f"seconds per concurrency level (default: {DEFAULT_DURATION})")
+    parser.add_argument("--texts-per-request", type=int, default=DEFAULT_TEXTS_PER_REQUEST,
+                        help=f"texts sent in each request (default: {DEFAULT_TEXTS_PER_REQUEST})")
+    parser.add_argument("--service-args", default="",
+                        help="extra arguments for the service started by the test, e.g. \"--max-wait-ms 2\"")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    texts = make_survey(TEXT_POOL_SIZE)['text'].dropna().tolist()
+
+    process = None
+    if args.unix:
+        address = f"unix:{args.unix}"
+    elif args.url:
+        address = args.url
+    else:
+        process, address = start_service(args.service_args.split())
+    target = parse_target(address)
+
+    results = []
+    try:
+        for level in levels:
+            result = asyncio.run(run_level(target, level, args.duration, texts, args.texts_per_request))
+            results.append(result)
+            if not args.json:
+                latency = result['latency_ms']
+                print(f"{level:>5} clients  {result['requests_per_second']:9,.0f} req/s  "
+                      f"{result['texts_per_second']:9,.0f} texts/s  "
+                      f"p50 {latency['p50'] or 0:7.1f} ms  p95 {latency['p95'] or 0:7.1f} ms  "
+                      f"p99 {latency['p99'] or 0:7.1f} ms  rejected {result['rejected']:>5}  "
+                      f"mean batch {result['service_mean_batch_size']:6.1f}")
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    if args.json:
+        print(json.dumps({'address': address, 'texts_per_request': args.texts_per_request, 'levels': results},
+                         indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Checkpointed runs over a growing CSV file, checked against stream_analysis of the whole file."""
+import pytest
+
+from sentiment_engine import incremental_analysis, stream_analysis
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+def assert_same_as_stream(result, path):
+    """Compare the figures; the summary text lists the labels in the order they were first seen."""
+    expected = stream_analysis(str(path))
+    assert result['rows'] == expected['rows']
+    assert result['mode'] == expected['mode']
+    assert result['sentiment_counts'] == expected['sentiment_counts']
+    assert result['average'] == pytest.approx(expected['average'])
+    if 'stats' in expected:
+        stats, expected_stats = dict(result['stats']), dict(expected['stats'])
+        assert stats.pop('distribution') == expected_stats.pop('distribution')
+        assert stats == pytest.approx(expected_stats)
+
+def test_row_split_across_runs(tmp_path):
+    path, checkpoint = tmp_path / "survey.csv", str(tmp_path / "survey.ckpt.json")
+    path.write_text("t\ngood\nterri", encoding='utf-8')
+    first = incremental_analysis(str(path), checkpoint)
+    assert_same_as_stream(first, path)
+    assert first['new_rows'] == 1
+
+    append(path, "ble\n")
+    second = incremental_analysis(str(path), checkpoint)
+    assert_same_as_stream(second, path)
+    assert second['rows'] == 2
+    assert second['sentiment_counts'] == {'Positive': 1, 'Negative': 1}
+
+def test_text_append(tmp_path):
+    path, checkpoint = tmp_path / "survey.csv", str(tmp_path / "survey.ckpt.json")
+    path.write_text("text,team\nThe team is great,a\nWork is okay,b\n", encoding='utf-8')
+    incremental_analysis(str(path), checkpoint)
+
+    append(path, "Management is terrible,a\n\"Not good, at all\",c\nNothing to report,b\n")
+    result = incremental_analysis(str(path), checkpoint)
+    assert result['new_rows'] == 3
+    assert_same_as_stream(result, path)
+
+def test_numeric_append_widens_range(tmp_path):
+    path, checkpoint = tmp_path / "ratings.csv", str(tmp_path / "ratings.ckpt.json")
+    path.write_text("rating\n" + "".join(f"{n}\n" for n in [2, 3, 3, 4]), encoding='utf-8')
+    incremental_analysis(str(path), checkpoint)
+
+    # 1 and 10 widen the range, which re-labels the rows of the first run.
+    append(path, "10\n1\n\n")
+    result = incremental_analysis(str(path), checkpoint)
+    assert result['stats']['min'] == 1 and result['stats']['max'] == 10
+    assert_same_as_stream(result, path)
+
+def test_rewritten_file_is_rejected(tmp_path):
+    path, checkpoint = tmp_path / "survey.csv", str(tmp_path / "survey.ckpt.json")
+    path.write_text("text\nThe team is great\nWork is okay\n", encoding='utf-8')
+    incremental_analysis(str(path), checkpoint)
+
+    path.write_text("text\nThe team is great, really\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="start a new checkpoint"):
+        incremental_analysis(str(path), checkpoint)
+
+def test_regenerated_file_is_rejected(tmp_path):
+    path, checkpoint = tmp_path / "survey.csv", str(tmp_path / "survey.ckpt.json")
+    path.write_text("text\nThe team is great\nWork is okay\n", encoding='utf-8')
+    incremental_analysis(str(path), checkpoint)
+
+    # Same length, still ends in a newline, and has more rows appended.
+    path.write_text("text\nThe team is awful\nWork is okay\nNothing to report\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="start a new checkpoint"):
+        incremental_analysis(str(path), checkpoint)
@@ -0,0 +1,82 @@
+"""Batch and parallel text scoring, checked against each other and against analyze_sentiment."""
+import random
+
+import numpy as np
+import pandas as pd
+from textblob.en import sentiment as pattern_sentiment
+
+from sentiment_core import (
+    analyze_sentiment,
+    analyze_sentiment_batch,
+    analyze_sentiment_parallel,
+    load_lexicon_index,
+)
+
+PHRASES = [
+    "The team is great", "Management is terrible", "Work is okay", "I love the new office",
+    "The schedule is awful", "Nothing to report", "Very supportive manager", "Not good at all",
+]
+
+def synthetic_corpus(rows=2_000, seed=0):
+    """Texts with missing values, numbers, empty and blank strings, and many repeats."""
+    rng = random.Random(seed)
+    specials = [np.nan, None, 5, 3.5, "", "   ", "\t\n", "42"]
+    values = []
+    for i in range(rows):
+        if i % 7 == 0:
+            values.append(rng.choice(specials))
+        elif i % 3 == 0:
+            values.append(rng.choice(PHRASES))
+        else:
+            values.append(" and ".join(rng.sample(PHRASES, 2)) + f" {i % 50}")
+    return pd.Series(values, dtype=object)
+
+def test_parallel_matches_serial():
+    series = synthetic_corpus()
+    labels, polarities = analyze_sentiment_batch(series)
+    parallel_labels, parallel_polarities = analyze_sentiment_parallel(series, workers=2)
+    assert np.array_equal(parallel_labels, labels)
+    assert np.array_equal(parallel_polarities, polarities)
+
+def test_parallel_keeps_row_order():
+    series = synthetic_corpus()
+    shuffled = series.sample(frac=1, random_state=1)
+    labels, polarities = analyze_sentiment_parallel(shuffled, workers=2)
+    serial_labels, serial_polarities = analyze_sentiment_batch(series)
+    order = shuffled.index.to_numpy()
+    assert np.array_equal(labels, serial_labels[order])
+    assert np.array_equal(polarities, serial_polarities[order])
+
+def lexicon_sentences(rows=3_000, seed=0):
+    """Sentences of lexicon words with negations, modifiers, "!", "(!)" and emoticons."""
+    rng = random.Random(seed)
+    lexicon, emoticons = load_lexicon_index()
+    polar = sorted(word for word, (polarity, _, is_modifier) in lexicon.items() if polarity and not is_modifier)
+    modifiers = sorted(word for word, (_, _, is_modifier) in lexicon.items() if is_modifier)
+    negations = sorted(pattern_sentiment.negations)
+    faces = sorted(emoticons)
+    fillers = ["the", "team", "is", "was", "work", "and", "but", "really", "12", "3.5"]
+    values = [np.nan, None, 7, 2.5, "", "!", "(!)"]
+    for _ in range(rows):
+        words = []
+        for _ in range(rng.randint(1, 8)):
+            kind = rng.random()
+            if kind < 0.15:
+                words.append(rng.choice(negations))
+            elif kind < 0.35:
+                words.append(rng.choice(modifiers))
+            elif kind < 0.7:
+                words.append(rng.choice(polar))
+            else:
+                words.append(rng.choice(fillers))
+            if rng.random() < 0.1:
+                words.append(rng.choice(["!", "(!)", rng.choice(faces)]))
+        values.append(" ".join(words))
+    return pd.Series(values, dtype=object)
+
+def test_batch_matches_textblob():
+    series = lexicon_sentences()
+    expected = [analyze_sentiment(value) for value in series]
+    labels, polarities = analyze_sentiment_batch(series)
+    np.testing.assert_allclose(polarities, [polarity for _, polarity in expected], rtol=0, atol=1e-12)
+    assert labels.tolist() == [label for label, _ in expected]